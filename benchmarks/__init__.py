@@ -0,0 +1,4 @@
+"""
+Бенчмарки приложения: загрузка и очистка данных, препроцессинг,
+предсказание модели, текстовые и графические отчёты.
+"""
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Запуск бенчмарков и сравнение результатов между прогонами.
+
+Пример:
+    python -m benchmarks.run --sizes 10000 100000 --output bench.json
+    python -m benchmarks.run --sizes 10000 100000 --baseline bench.json --threshold 15
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from benchmarks.synthetic import ROOT_PATH, generate, read_value_sets
+
+sys.path.insert(0, os.path.join(ROOT_PATH, 'scripts'))
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+DEFAULT_SIZES = [10_000, 100_000]
+SINGLE_PREDICTIONS = 50
+APPEND_ROWS = 10_000
+
+
+def timeit(function, repeat):
+    """
+        Замеряет время выполнения функции.
+
+        Args:
+                function (Callable): Функция без аргументов
+                repeat (int): Количество повторов
+
+        Returns:
+                dict: Медиана, минимум и все замеры в секундах
+        """
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return {"median": statistics.median(runs), "min": min(runs), "runs": runs}
+
+
+def cases(main, prediction, data_processing, ingestion, raw, csv_path):
+    """
+        Собирает сценарии бенчмарка для одного размера датасета.
+
+        Общие заготовки (очищенные данные, DataStore) строятся при первом
+    обращении, поэтому для сценариев, отобранных через --only, готовится
+    только то, что им нужно.
+
+        Args:
+                main (module): Модуль main.py
+                prediction (module): Модуль prediction.py
+                data_processing (module): Модуль data_processing.py
+                ingestion (module): Модуль ingestion.py
+                raw (pd.DataFrame): Сырые синтетические данные
+                csv_path (str): Путь к тем же данным в CSV
+
+        Returns:
+                Dict[str, Callable]: Название сценария -> функция, которая готовит
+                    и возвращает замеряемую функцию без аргументов
+        """
+    preprocessor = prediction.get_preprocessor()
+
+    @functools.lru_cache(maxsize=None)
+    def data():
+        return main.clean_dataset(raw, main.valid_values)
+
+    @functools.lru_cache(maxsize=None)
+    def features():
+        return data().drop(columns=['class'])
+
+    def fit_preprocessor(frame):
+        return data_processing.DataPreprocessor(
+            needed_columns=preprocessor.needed_columns,
+            valid_values=preprocessor.valid_values,
+            target_column='class').fit(frame)
+
+    def predict_single():
+        single = features().head(SINGLE_PREDICTIONS).to_dict(orient='records')
+
+        def run_single():
+            for row in single:
+                prediction.predict_one(row)
+        return run_single
+
+    def append_rows():
+        rules = {}
+        store = ingestion.DataStore(csv_path, lambda rows: main.clean_dataset(rows, main.valid_values, rules))
+        new_rows = raw.head(APPEND_ROWS)
+
+        def run_append():
+            # Дописанные куски склеиваются при следующем чтении, поэтому учитываем и его
+            store.append(new_rows)
+            store.frame()
+        return run_append
+
+    def predict_batch():
+        batch = features()
+
+        def run_batch():
+            labels = prediction.predict(batch)
+            assert len(labels) == len(batch), \
+                f"Препроцессор отбросил {len(batch) - len(labels)} из {len(batch)} строк"
+        return run_batch
+
+    return {
+        "load": lambda: functools.partial(main.load_dataset, csv_path),
+        "clean": lambda: functools.partial(main.clean_dataset, raw, main.valid_values),
+        "append_rows": append_rows,
+        "preprocessor_fit": lambda: functools.partial(fit_preprocessor, data()),
+        "preprocessor_transform": lambda: functools.partial(preprocessor.transform, data()),
+        "predict_single": predict_single,
+        "predict_batch": predict_batch,
+        "feature_class_correlation": lambda: functools.partial(
+            main.feature_class_correlation, data(), 'cap-shape'),
+        "feature_mean_cap_diameter": lambda: functools.partial(
+            main.feature_mean_cap_diameter, data(), 'cap-shape', 'cap-color', 'season'),
+        "class_ranged_by_stem_height": lambda: functools.partial(
+            main.class_ranged_by_stem_height, data(), 2, 8),
+        "cap_diams_stem_heights": lambda: functools.partial(
+            main.cap_diams_stem_heights, data(), 5, 15, 'a'),
+        "class_boxplot": lambda: functools.partial(main.class_boxplot, data(), 'cap-diameter'),
+        "cap_diameter_histplot": lambda: functools.partial(main.cap_diameter_histplot, data(), 'season'),
+        "stem_height_scatterplot": lambda: functools.partial(
+            main.stem_height_scatterplot, data(), 'cap-diameter', 'season'),
+        "stem_width_boxplot": lambda: functools.partial(main.stem_width_boxplot, data(), 'habitat'),
+    }
+
+
+def run(sizes, repeat, only=None):
+    """
+        Прогоняет все сценарии на синтетических датасетах заданных размеров.
+
+        Args:
+                sizes (List[int]): Размеры датасетов
+                repeat (int): Количество повторов каждого сценария
+                only (List[str]): Запускать только эти сценарии
+
+        Returns:
+                dict: Метаданные прогона и результаты по ключам "<сценарий>@<размер>"
+        """
+    workdir = tempfile.mkdtemp(prefix='mushroom-bench-')
+
+    import main  # pylint: disable=import-outside-toplevel
+    import prediction  # pylint: disable=import-outside-toplevel
+    import data_processing  # pylint: disable=import-outside-toplevel
+    import ingestion  # pylint: disable=import-outside-toplevel
+
+    # Справочники читаются по относительному пути, загружаем их до смены каталога
+    main.get_valid_values()
+    # Графики сохраняются в ./graphics, не трогаем файлы репозитория
+    os.makedirs(os.path.join(workdir, 'graphics'), exist_ok=True)
+    os.chdir(workdir)
+    prediction.get_model()
+    # Признаки модели генерируем из значений, которые принимает обученный препроцессор:
+    # в справочниках store.xlsx есть опечатки (кириллическая 'с' в gill-attachment, 'g ' в gill-color)
+    value_sets = read_value_sets()
+    value_sets.update(prediction.get_preprocessor().valid_values)
+
+    results = {}
+    for size in sizes:
+        raw = generate(size, value_sets)
+        csv_path = os.path.join(workdir, f'{size}.csv')
+        raw.to_csv(csv_path, index=False)
+        for name, prepare in cases(main, prediction, data_processing, ingestion, raw, csv_path).items():
+            if only and name not in only:
+                continue
+            results[f'{name}@{size}'] = timeit(prepare(), repeat)
+            print(f"{name:>28} @ {size:>10}: {results[f'{name}@{size}']['median'] * 1000:10.2f} ms")
+        os.remove(csv_path)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold, overrides=None):
+    """
+        Сравнивает медианы текущего прогона с базовым.
+
+        Args:
+                current (dict): Результаты текущего прогона
+                baseline (dict): Результаты базового прогона
+                threshold (float): Допустимое замедление в процентах
+                overrides (Dict[str, float]): Порог для отдельных сценариев
+
+        Returns:
+                List[str]: Описания регрессий, пустой список если их нет
+        """
+    overrides = overrides or {}
+    regressions = []
+    for key, result in current["results"].items():
+        if key not in baseline["results"]:
+            continue
+        before = baseline["results"][key]["median"]
+        after = result["median"]
+        change = (after / before - 1) * 100 if before > 0 else 0.0
+        limit = overrides.get(key.split('@')[0], threshold)
+        marker = "REGRESSION" if change > limit else "ok"
+        print(f"{key:>40}: {before * 1000:10.2f} -> {after * 1000:10.2f} ms ({change:+7.1f}%) {marker}")
+        if change > limit:
+            regressions.append(f"{key}: {change:+.1f}% (limit {limit}%)")
+    return regressions
+
+
+def parse_overrides(items):
+    """
+        Разбирает пороги вида name=percent.
+
+        Returns:
+                Dict[str, float]: Сценарий -> допустимое замедление в процентах
+        """
+    overrides = {}
+    for item in items or []:
+        name, value = item.split('=', 1)
+        overrides[name] = float(value)
+    return overrides
+
+
+def main():
+    """
+    Точка входа бенчмарков.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Размеры синтетических датасетов (от 10k до 10M строк)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', help='Запустить только указанные сценарии')
+    parser.add_argument('--output', default='bench.json', help='Куда сохранить результаты')
+    parser.add_argument('--baseline', help='Результаты предыдущего прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='Допустимое замедление медианы в процентах')
+    parser.add_argument('--threshold-for', nargs='+', metavar='NAME=PERCENT',
+                        help='Порог для отдельных сценариев, например predict_single=10')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    results = run(args.sizes, args.repeat, args.only)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, parse_overrides(args.threshold_for))
+        if regressions:
+            print("Performance regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
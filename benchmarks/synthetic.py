@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Генератор синтетического датасета грибов.
+
+Значения категориальных признаков берутся из справочников store.xlsx
+(benchmarks.run заменяет признаки модели значениями, которые принимает
+обученный препроцессор), доли пропусков близки к исходному датасету,
+поэтому очистка из main.py отбрасывает те же колонки, что и на реальных данных.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUIDE_PATH = os.path.join(ROOT_PATH, 'data', 'store.xlsx')
+
+COLUMNS = [
+    'id', 'class', 'cap-diameter', 'cap-shape', 'cap-surface', 'cap-color',
+    'does-bruise-or-bleed', 'gill-attachment', 'gill-spacing', 'gill-color',
+    'stem-height', 'stem-width', 'stem-root', 'stem-surface', 'stem-color',
+    'veil-type', 'veil-color', 'has-ring', 'ring-type', 'spore-print-color',
+    'habitat', 'season'
+]
+
+# Доля пропусков в колонках исходного датасета
+NA_SHARE = {
+    'cap-surface': 0.23, 'gill-attachment': 0.16, 'gill-spacing': 0.41,
+    'stem-root': 0.84, 'stem-surface': 0.62, 'veil-type': 0.95,
+    'veil-color': 0.88, 'ring-type': 0.04, 'spore-print-color': 0.90
+}
+
+# Параметры логнормальных распределений числовых признаков: (съедобные, ядовитые)
+NUMERIC = {
+    'cap-diameter': ((1.80, 0.55), (1.60, 0.60)),
+    'stem-height': ((1.85, 0.45), (1.75, 0.50)),
+    'stem-width': ((2.30, 0.70), (2.10, 0.75))
+}
+
+
+def read_value_sets(path=GUIDE_PATH):
+    """
+        Читает допустимые значения признаков из справочников MS Excel файла.
+
+        Args:
+                path (str): Путь к store.xlsx
+
+        Returns:
+                Dict[str, np.ndarray]: Признак -> допустимые значения
+        """
+    file = pd.ExcelFile(path)
+    return {name: file.parse(name).loc[:, name].dropna().values for name in file.sheet_names[1:]}
+
+
+def generate(n_rows, value_sets=None, seed=0):
+    """
+        Генерирует датасет заданного размера.
+
+        Args:
+                n_rows (int): Количество строк
+                value_sets (Dict[str, np.ndarray]): Допустимые значения признаков,
+                    по умолчанию читаются из store.xlsx
+                seed (int): Зерно генератора случайных чисел
+
+        Returns:
+                pd.DataFrame: Датафрейм с колонками исходного dataset.csv
+        """
+    if value_sets is None:
+        value_sets = read_value_sets()
+    rng = np.random.default_rng(seed)
+
+    poisonous = rng.random(n_rows) < 0.55
+    columns = {'id': np.arange(n_rows)}
+    columns['class'] = np.where(poisonous, 'p', 'e')
+
+    for name, (edible, poison) in NUMERIC.items():
+        mean = np.where(poisonous, poison[0], edible[0])
+        sigma = np.where(poisonous, poison[1], edible[1])
+        columns[name] = np.round(rng.lognormal(mean, sigma), 2)
+
+    for name in COLUMNS:
+        if name in columns:
+            continue
+        values = np.asarray(value_sets[name], dtype=object)
+        column = values[rng.integers(0, len(values), n_rows)]
+        share = NA_SHARE.get(name)
+        if share:
+            column[rng.random(n_rows) < share] = None
+        columns[name] = column
+
+    return pd.DataFrame(columns, columns=COLUMNS)
+
+
+def write_dataset(n_rows, path, value_sets=None, seed=0):
+    """
+        Генерирует датасет и сохраняет его в CSV.
+
+        Args:
+                n_rows (int): Количество строк
+                path (str): Путь к CSV файлу
+                value_sets (Dict[str, np.ndarray]): Допустимые значения признаков
+                seed (int): Зерно генератора случайных чисел
+
+        Returns:
+                str: Путь к сохранённому файлу
+        """
+    generate(n_rows, value_sets, seed).to_csv(path, index=False)
+    return path
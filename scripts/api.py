@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+Python project. Binary classification of mushrooms.
+
+Performed by: Andreev Alexander, Chapaykin Arseniy, Ro Alexander, Shmelev Anton
+"""
+
+import argparse
+import base64
+import contextlib
+import threading
+from typing import Dict, List, Optional
+import orjson
+import pandas as pd
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
+from main import get_data, get_store, append_rows, load_seaborn
+from prediction import get_model, get_preprocessor, invalid_values, predict
+from metrics import METRICS, set_profiling
+from explanation import explain, global_importance
+from sampling import get_sample
+from reports import REPORTS, run_all, run_report, warm_pool
+
+HOST = "127.0.0.1"
+PORT = 7860
+KEEP_ALIVE_TIMEOUT = 75
+WATCH_INTERVAL = 1.0
+
+router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
+
+warmed = threading.Event()
+
+
+class Mushroom(BaseModel):
+    """
+    Описание гриба в буквенных кодах датасета.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    cap_shape: str = Field(alias="cap-shape")
+    cap_surface: str = Field(alias="cap-surface")
+    cap_color: str = Field(alias="cap-color")
+    does_bruise_or_bleed: str = Field(alias="does-bruise-or-bleed")
+    gill_attachment: str = Field(alias="gill-attachment")
+    gill_color: str = Field(alias="gill-color")
+    stem_color: str = Field(alias="stem-color")
+    has_ring: str = Field(alias="has-ring")
+    ring_type: Optional[str] = Field(default=None, alias="ring-type")
+    habitat: str
+    season: str
+    cap_diameter: float = Field(alias="cap-diameter")
+    stem_height: float = Field(alias="stem-height")
+    stem_width: float = Field(alias="stem-width")
+
+
+def mushrooms_frame(mushrooms):
+    """
+    Собирает датафрейм из описаний грибов и проверяет допустимость значений.
+
+    Args:
+        mushrooms (List[Mushroom]): Описания грибов.
+
+    Returns:
+        pd.DataFrame: Датафрейм в формате, ожидаемом препроцессором.
+
+    Raises:
+        HTTPException: Если какое-то значение не входит в справочник.
+    """
+    frame = pd.DataFrame([mushroom.model_dump(by_alias=True) for mushroom in mushrooms])
+    bad = invalid_values(frame)
+    if bad:
+        raise HTTPException(status_code=422, detail={
+            "invalid_values": {str(row): cols for row, cols in bad.items()}})
+    return frame
+
+
+def records(frame):
+    """
+    Переводит таблицу отчёта в список словарей для JSON.
+
+    Args:
+        frame (pd.DataFrame): Результат отчёта.
+
+    Returns:
+        list: Строки таблицы, индекс (если он не порядковый) выносится в колонки.
+    """
+    if not isinstance(frame.index, pd.RangeIndex):
+        frame = frame.reset_index()
+    return frame.rename(columns=str).to_dict(orient="records")
+
+
+def report_body(report, result, info):
+    """
+    Переводит результат отчёта в JSON: таблицы — список строк, графики — PNG в base64,
+    для приближённых отчётов добавляется описание выборки.
+    """
+    if report.output == "image":
+        return {"image": base64.b64encode(result).decode("ascii")}
+    if info is not None:
+        return {**info, "rows": records(result)}
+    return records(result)
+
+
+@router.get("/health")
+def health():
+    """
+    Проверка работоспособности сервера.
+    """
+    return {"status": "ok", "warm": warmed.is_set()}
+
+
+@router.post("/profiling")
+def profiling(slow_ms: Optional[float] = None):
+    """
+    Включает сохранение стеков запросов дольше slow_ms миллисекунд в ./profiles,
+    без параметра — выключает.
+    """
+    set_profiling(slow_ms)
+    return {"slow_ms": slow_ms}
+
+
+def metrics():
+    """
+    Метрики приложения в текстовом формате Prometheus.
+    """
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.post("/predict")
+def predict_mushroom(mushroom: Mushroom):
+    """
+    Предсказывает класс одного гриба.
+    """
+    return {"class": str(predict(mushrooms_frame([mushroom]))[0])}
+
+
+@router.post("/predict/batch")
+def predict_batch(mushrooms: List[Mushroom]):
+    """
+    Предсказывает классы для списка грибов одним вызовом модели.
+    """
+    if not mushrooms:
+        return {"classes": []}
+    return {"classes": [str(label) for label in predict(mushrooms_frame(mushrooms))]}
+
+
+@router.post("/explain")
+def explain_mushroom(mushroom: Mushroom):
+    """
+    Вклад каждого признака в предсказание для одного гриба.
+    """
+    return explain(mushrooms_frame([mushroom]))[0]
+
+
+@router.post("/explain/batch")
+def explain_batch(mushrooms: List[Mushroom]):
+    """
+    Вклады признаков для списка грибов, непосчитанные SHAP-значения считаются одним вызовом.
+    """
+    if not mushrooms:
+        return []
+    return explain(mushrooms_frame(mushrooms))
+
+
+@router.get("/importance")
+def importance():
+    """
+    Важность признаков для модели в целом.
+    """
+    return global_importance()
+
+
+@router.post("/data/append")
+def append_data(rows: List[dict]):
+    """
+    Дописывает новые наблюдения (строки в формате dataset.csv) без перезагрузки датасета.
+    """
+    if not rows:
+        return {"received": 0, "accepted": 0, "version": get_store().version}
+    accepted, version = append_rows(pd.DataFrame(rows))
+    return {"received": len(rows), "accepted": accepted, "version": version}
+
+
+@router.get("/reports")
+def list_reports():
+    """
+    Описание всех отчётов: входы, тип результата, стоимость и кэширование.
+    """
+    return [{
+        "name": report.name,
+        "inputs": [{key: param[key] for key in ("arg", "name", "type", "values", "size")}
+                   for param in report.inputs],
+        "output": report.output,
+        "cost": report.cost,
+        "cache": report.cache,
+        "approximate": report.approximate is not None,
+    } for report in REPORTS.values()]
+
+
+@router.get("/reports/{name}")
+def report_endpoint(name: str, request: Request, approximate: bool = False):
+    """
+    Строит отчёт из реестра по параметрам запроса. Таблицы возвращаются списком строк,
+    графики — PNG в base64. С approximate=true отчёты, которые это поддерживают,
+    оцениваются по выборке, и в ответ добавляется описание выборки.
+    """
+    if name not in REPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown report {name}")
+    report = REPORTS[name]
+    params = {}
+    for param in report.inputs:
+        if param["type"] == "list":
+            params[param["arg"]] = request.query_params.getlist(param["arg"]) or None
+        else:
+            params[param["arg"]] = request.query_params.get(param["arg"])
+    try:
+        result, info = run_report(name, params, approximate)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from error
+    return report_body(report, result, info)
+
+
+@router.post("/reports")
+def dashboard_endpoint(params: Dict[str, dict], approximate: bool = False):
+    """
+    Строит сразу несколько отчётов параллельно. Тело запроса — идентификатор отчёта ->
+    его параметры. Ответ — NDJSON: по строке {"name", "result"} или {"name", "error"}
+    на каждый отчёт в порядке готовности.
+    """
+    unknown = [name for name in params if name not in REPORTS]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown reports {unknown}")
+    results = run_all(params, params if approximate else ())
+
+    def lines():
+        for name, result, info, error in results:
+            message = str(error) if isinstance(error, ValueError) else repr(error)
+            line = {"name": name, "error": message} if error is not None \
+                else {"name": name, "result": report_body(REPORTS[name], result, info)}
+            yield orjson.dumps(line, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def warm_up(watch=False):
+    """
+    Загружает данные, модель, препроцессор и seaborn, запускает процессы пула для графиков.
+
+    Args:
+        watch (bool): Следить за дозаписью строк в файл датасета.
+    """
+    get_data()
+    get_sample()
+    if watch:
+        get_store().watch(WATCH_INTERVAL)
+    get_model()
+    get_preprocessor()
+    global_importance()
+    load_seaborn()
+    warm_pool()
+    warmed.set()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """
+    Прогревает приложение: в ленивом режиме в фоновом потоке, уже принимая
+    запросы, иначе — до приёма первого запроса.
+    """
+    if app.state.lazy:
+        threading.Thread(target=warm_up, args=(app.state.watch,), name="warm-up", daemon=True).start()
+    else:
+        warm_up(app.state.watch)
+    yield
+
+
+def create_app(lazy=False, watch=False):
+    """
+    Создаёт FastAPI-приложение с JSON API.
+
+    Args:
+        lazy (bool): Прогревать данные и модель в фоне после старта сервера.
+        watch (bool): Дочитывать строки, дописанные в файл датасета.
+
+    Returns:
+        FastAPI: Приложение, к которому можно примонтировать интерфейс Gradio.
+    """
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+    app.state.lazy = lazy
+    app.state.watch = watch
+    app.include_router(router)
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+    return app
+
+
+def parse_args():
+    """
+    Разбирает параметры запуска сервера.
+    """
+    parser = argparse.ArgumentParser(description="Mushroom classification server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--lazy", action="store_true",
+                        help="Начать принимать запросы сразу, прогревая данные и модель в фоне")
+    parser.add_argument("--watch", action="store_true",
+                        help="Дочитывать новые строки, дописанные в файл датасета")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Запуск без интерфейса Gradio: только JSON API
+    import uvicorn  # pylint: disable=import-outside-toplevel
+    args = parse_args()
+    uvicorn.run(create_app(args.lazy, args.watch), host=args.host, port=args.port, timeout_keep_alive=KEEP_ALIVE_TIMEOUT)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Python project. Binary classification of mushrooms.
+
+Performed by: Andreev Alexander, Chapaykin Arseniy, Ro Alexander, Shmelev Anton
+"""
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from loading import cached_loader
+from metrics import record_cache, record_rows, timed
+from prediction import encode, get_model, get_preprocessor, load_cached
+
+EXPLANATION_CACHE_SIZE = 4096
+
+explanation_cache = OrderedDict()
+cache_lock = threading.Lock()
+
+
+@cached_loader
+def feature_groups():
+    """
+    Сопоставляет колонки после DataPreprocessor исходным признакам:
+    сначала идут числовые признаки (StandardScaler), затем one-hot колонки
+    категориальных признаков (OneHotEncoder) в порядке ohe.categories_.
+
+    Returns:
+        tuple: Список исходных признаков и разреженная матрица
+               (колонки модели x исходные признаки) из нулей и единиц
+    """
+    from scipy.sparse import csr_matrix  # pylint: disable=import-outside-toplevel
+    preprocessor = get_preprocessor()
+    names = list(preprocessor.continuous_columns)
+    owners = list(range(len(names)))
+    for col, categories in zip(preprocessor.categorical_columns, preprocessor.ohe.categories_):
+        names.append(col)
+        owners.extend([len(names) - 1] * len(categories))
+    owners = np.asarray(owners)
+    matrix = csr_matrix((np.ones(len(owners)), (np.arange(len(owners)), owners)),
+                        shape=(len(owners), len(names)))
+    return names, matrix
+
+
+def cache_key(row):
+    """
+    Ключ кэша — закодированная строка признаков модели.
+    """
+    return row.indices.tobytes() + row.data.tobytes()
+
+
+def explain(dataframe):
+    """
+    Считает вклад каждого исходного признака в предсказание (SHAP-значения
+    CatBoost, сложенные по one-hot колонкам одного признака).
+
+    Строки, которые уже объяснялись, берутся из кэша, остальные считаются
+    одним пакетным вызовом.
+
+    Args:
+        dataframe (pd.DataFrame): Описания грибов в буквенных кодах
+
+    Returns:
+        List[dict]: Для каждой строки: предсказанный класс, класс, в сторону которого
+                    указывают положительные вклады, базовое значение и вклады признаков
+    """
+    x_encoded = encode(dataframe)
+    x_encoded.sort_indices()
+    model = load_cached(get_model, 'model')
+    names, groups = feature_groups()
+    keys = [cache_key(x_encoded[i]) for i in range(x_encoded.shape[0])]
+
+    with cache_lock:
+        cached = {key: explanation_cache[key] for key in keys if key in explanation_cache}
+        for key in cached:
+            explanation_cache.move_to_end(key)
+    misses = [i for i, key in enumerate(keys) if key not in cached]
+    for key in keys:
+        record_cache('shap', key in cached)
+
+    if misses:
+        from catboost import Pool  # pylint: disable=import-outside-toplevel
+        rows = x_encoded[misses]
+        with timed('shap'):
+            shap_values = model.get_feature_importance(Pool(rows), type='ShapValues')
+            labels = model.predict(rows)
+        contributions = groups.T.dot(shap_values[:, :-1].T).T
+        with cache_lock:
+            for position, i in enumerate(misses):
+                cached[keys[i]] = {
+                    "class": str(labels[position]),
+                    "positive_class": str(model.classes_[1]),
+                    "base_value": float(shap_values[position, -1]),
+                    "contributions": dict(zip(names, map(float, contributions[position]))),
+                }
+                explanation_cache[keys[i]] = cached[keys[i]]
+            while len(explanation_cache) > EXPLANATION_CACHE_SIZE:
+                explanation_cache.popitem(last=False)
+        record_rows(len(misses))
+
+    return [cached[key] for key in keys]
+
+
+def explain_one(features):
+    """
+    Вклад признаков в предсказание для одного гриба.
+
+    Args:
+        features (dict): Признак -> буквенный код или число
+
+    Returns:
+        dict: Объяснение в формате explain()
+    """
+    return explain(pd.DataFrame(features, index=[0]))[0]
+
+
+@cached_loader
+def global_importance():
+    """
+    Важность исходных признаков для модели в целом (PredictionValuesChange,
+    сложенная по one-hot колонкам). Считается один раз при загрузке модели.
+
+    Returns:
+        Dict[str, float]: Признак -> важность, по убыванию
+    """
+    names, groups = feature_groups()
+    importance = groups.T.dot(np.asarray(get_model().get_feature_importance()))
+    return dict(sorted(zip(names, map(float, importance)), key=lambda item: -item[1]))
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Python project. Binary classification of mushrooms.
+
+Performed by: Andreev Alexander, Chapaykin Arseniy, Ro Alexander, Shmelev Anton
+"""
+
+import io
+import os
+import threading
+import pandas as pd
+
+# Сколько байт перед позицией чтения запоминать, чтобы заметить подмену файла
+TAIL_SIZE = 4096
+
+
+def read_complete_lines(path, offset=0):
+    """
+        Читает CSV начиная с байта offset до последнего полного перевода строки,
+    чтобы не разобрать строку, которую ещё дописывают.
+
+        Args:
+                path (str): Путь к CSV файлу
+                offset (int): Позиция, с которой читать
+
+        Returns:
+                Tuple[bytes, int]: Прочитанные байты и позиция конца последней полной строки
+        """
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        content = file.read()
+    end = content.rfind(b'\n') + 1
+    return content[:end], offset + end
+
+
+class DataStore:
+    """
+    Очищенный датасет в памяти, к которому можно дописывать новые строки
+    без полной перезагрузки.
+
+    Новые строки хранятся отдельными кусками и склеиваются с основным
+    датафреймом только при следующем чтении: сама дозапись стоит столько же,
+    сколько очистка новых строк, а первое чтение после неё копирует весь
+    датасет (один раз на любое число дозаписей между чтениями). Каждая
+    дозапись увеличивает version — по нему инвалидируются кэши отчётов.
+    """
+
+    def __init__(self, path, clean):
+        """
+        Args:
+            path (str): Путь к CSV файлу датасета
+            clean (Callable[[pd.DataFrame], pd.DataFrame]): Очистка сырых строк
+        """
+        self.path = path
+        self.clean = clean
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.version = 0
+        self.chunks = []
+        self.columns = []
+        self.next_index = 0
+        self.offset = 0
+        self.tail = b''
+        self.file_id = None
+        self.partial = False
+        self.reload()
+
+    def reload(self):
+        """
+        Полностью перечитывает датасет с диска, включая последнюю строку
+        без перевода строки в конце.
+
+        Такая строка может быть ещё не дописана, поэтому позиция чтения
+        остаётся перед ней: когда строку допишут, ingest_file() перечитает
+        файл целиком, и недописанный вариант строки заменится полным.
+        """
+        with open(self.path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            content = file.read()
+        raw = pd.read_csv(io.BytesIO(content))
+        frame = self.clean(raw)
+        end = content.rfind(b'\n') + 1
+        partial = end < len(content) and len(raw) > 0
+        with self.lock:
+            self.columns = list(raw.columns)
+            self.chunks = [frame]
+            self.next_index = len(raw)
+            self.offset = end if partial else len(content)
+            self.partial = partial
+            self.tail = content[:self.offset][-TAIL_SIZE:]
+            self.file_id = (stat.st_ino, stat.st_mtime_ns)
+            self.version += 1
+            for listener in self.listeners:
+                listener(frame, self.version, True)
+
+    def subscribe(self, listener):
+        """
+        Подписывает производные структуры на изменения данных.
+
+        Args:
+            listener (Callable[[pd.DataFrame, int, bool], None]): Вызывается с
+                очищенными строками, новой версией и признаком полной перезагрузки
+                (тогда строки — это весь датасет)
+        """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def frame(self):
+        """
+        Возвращает весь очищенный датасет.
+
+        Returns:
+            pd.DataFrame: Очищенные данные
+        """
+        return self.snapshot()[1]
+
+    def snapshot(self):
+        """
+        Возвращает версию и соответствующий ей датасет одной операцией.
+
+        Returns:
+            Tuple[int, pd.DataFrame]: Версия и очищенные данные
+        """
+        with self.lock:
+            if len(self.chunks) > 1:
+                self.chunks = [pd.concat(self.chunks)]
+            return self.version, self.chunks[0]
+
+    def append(self, raw):
+        """
+        Очищает и дописывает новые строки.
+
+        Args:
+            raw (pd.DataFrame): Сырые строки в формате dataset.csv
+
+        Returns:
+            Tuple[int, int]: Количество принятых после очистки строк и версия
+                (не меняется, если очистка отбросила все строки)
+        """
+        with self.lock:
+            start = self.next_index
+            self.next_index += len(raw)
+        raw = raw.set_axis(pd.RangeIndex(start, start + len(raw)), axis=0)
+        rows = self.clean(raw)
+        with self.lock:
+            if not len(rows):
+                return 0, self.version
+            self.chunks.append(rows)
+            self.version += 1
+            for listener in self.listeners:
+                listener(rows, self.version, False)
+            return len(rows), self.version
+
+    def replaced(self, stat):
+        """
+        Проверяет, заменили или переписали ли файл, а не только дописали в конец:
+        другой inode, файл стал короче или изменились уже прочитанные байты.
+        """
+        if stat.st_ino != self.file_id[0] or stat.st_size < self.offset:
+            return True
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset - len(self.tail))
+            return file.read(len(self.tail)) != self.tail
+
+    def ingest_file(self):
+        """
+        Дочитывает строки, дописанные в CSV файл с прошлого чтения.
+        Если файл заменили или переписали, перечитывает его целиком.
+
+        Returns:
+            int: Количество принятых строк
+        """
+        stat = os.stat(self.path)
+        if (stat.st_ino, stat.st_mtime_ns) == self.file_id:
+            return 0
+        if self.replaced(stat):
+            self.reload()
+            return len(self.frame())
+        content, offset = read_complete_lines(self.path, self.offset)
+        if not content:
+            return 0
+        if self.partial:
+            # Последнюю строку загрузили недописанной, теперь она дописана
+            self.reload()
+            return len(self.frame())
+        raw = pd.read_csv(io.BytesIO(content), header=None, names=self.columns)
+        self.tail = (self.tail + content)[-TAIL_SIZE:]
+        self.offset = offset
+        self.file_id = (stat.st_ino, stat.st_mtime_ns)
+        return self.append(raw)[0]
+
+    def watch(self, interval=1.0):
+        """
+        Запускает фоновый поток, который раз в interval секунд дочитывает
+        новые строки CSV файла.
+
+        Returns:
+            threading.Event: Событие, установка которого останавливает наблюдение
+        """
+        stopped = threading.Event()
+
+        def loop():
+            while not stopped.wait(interval):
+                try:
+                    self.ingest_file()
+                except (OSError, ValueError):
+                    # Файл могут заменять прямо сейчас, попробуем на следующем шаге
+                    continue
+
+        threading.Thread(target=loop, name='dataset-watch', daemon=True).start()
+        return stopped
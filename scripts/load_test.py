@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Python project. Binary classification of mushrooms.
+
+Нагрузочный тест: сравнение задержек JSON API и пути через Gradio.
+Перед запуском поднимите приложение: python scripts/main_interface.py
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from gradio_client import Client
+
+# Один и тот же гриб в буквенных кодах (для API) и в значениях интерфейса (для Gradio)
+API_SAMPLE = {
+    "cap-shape": "x", "cap-surface": "s", "cap-color": "n",
+    "does-bruise-or-bleed": "f", "gill-attachment": "a", "gill-color": "w",
+    "stem-color": "w", "has-ring": "t", "ring-type": "f", "habitat": "d",
+    "season": "w", "cap-diameter": 6.5, "stem-height": 7.2, "stem-width": 11.3
+}
+GRADIO_SAMPLE = [
+    "Выпуклая", "Гладкая", "Коричневый", "Нет", "Приросшие", "Белый",
+    "Белый", "true", "Плоское", "Леса", "Осень", 6.5, 7.2, 11.3
+]
+
+
+def measure(call, n_requests, concurrency):
+    """
+    Выполняет call n_requests раз в concurrency потоках.
+
+    Returns:
+        tuple: Список задержек в миллисекундах и общее время в секундах.
+    """
+    def timed(_):
+        start = time.perf_counter()
+        call()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(n_requests)))
+    return latencies, time.perf_counter() - start
+
+
+def summary(name, latencies, elapsed, rows=1):
+    """
+    Печатает сводку по задержкам запросов и пропускной способности.
+
+    Args:
+        name (str): Название сценария.
+        latencies (list): Задержки запросов в миллисекундах (не меньше двух).
+        elapsed (float): Общее время в секундах.
+        rows (int): Количество грибов в одном запросе.
+    """
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:>8}: mean {statistics.mean(latencies):8.2f} ms | "
+          f"p50 {quantiles[49]:8.2f} ms | p95 {quantiles[94]:8.2f} ms | "
+          f"p99 {quantiles[98]:8.2f} ms | {len(latencies) / elapsed:8.1f} req/s | "
+          f"{len(latencies) * rows / elapsed:10.1f} rows/s")
+
+
+def main():
+    """
+    Точка входа нагрузочного теста.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:7860")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=100, help="Размер пакета для /api/predict/batch")
+    parser.add_argument("--batch-requests", type=int, default=20,
+                        help="Количество запросов к /api/predict/batch")
+    args = parser.parse_args()
+    # Для перцентилей нужно хотя бы два замера
+    if args.requests < 2 or args.batch_requests < 2:
+        parser.error("--requests и --batch-requests должны быть не меньше 2")
+
+    # Один клиент на все потоки: соединения переиспользуются (keep-alive)
+    with httpx.Client(base_url=args.url, timeout=60) as http:
+        http.post("/api/predict", json=API_SAMPLE).raise_for_status()
+        summary("api", *measure(
+            lambda: http.post("/api/predict", json=API_SAMPLE).raise_for_status(),
+            args.requests, args.concurrency))
+
+        batch = [API_SAMPLE] * args.batch
+        summary("batch", *measure(
+            lambda: http.post("/api/predict/batch", json=batch).raise_for_status(),
+            args.batch_requests, args.concurrency), rows=args.batch)
+
+    gradio = Client(args.url, verbose=False)
+    gradio.predict(*GRADIO_SAMPLE, api_name="/predict")
+    summary("gradio", *measure(
+        lambda: gradio.predict(*GRADIO_SAMPLE, api_name="/predict"),
+        args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Python project. Binary classification of mushrooms.
+
+Performed by: Andreev Alexander, Chapaykin Arseniy, Ro Alexander, Shmelev Anton
+"""
+
+import functools
+import threading
+
+
+def cached_loader(loader):
+    """
+    Декоратор загрузчика без аргументов: результат кэшируется, как с
+    functools.lru_cache, но загрузчик выполняется не более одного раза,
+    даже если его одновременно вызывают фоновый прогрев и потоки запросов.
+
+    Args:
+        loader (Callable[[], object]): Загрузчик.
+
+    Returns:
+        Callable[[], object]: Загрузчик с кэшем, у которого есть cache_info() и cache_clear().
+    """
+    cached = functools.lru_cache(maxsize=None)(loader)
+    lock = threading.Lock()
+
+    @functools.wraps(loader)
+    def wrapper():
+        if cached.cache_info().currsize:
+            return cached()
+        with lock:
+            return cached()
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
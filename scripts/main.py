@@ -7,8 +7,8 @@ Performed by: Andreev Alexander, Chapaykin Arseniy, Ro Alexander, Shmelev Anton
 
 import os
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+from ingestion import DataStore
+from loading import cached_loader
 
 os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -41,16 +41,34 @@ def configure_guides(path):
 
 FILE_PATH = './data'
 
-guides = configure_guides(FILE_PATH)
 
-# Creating dictionary with valid values of each feature to filter invalid rows of df
-valid_values = {}
-for name, guide in guides.items():
-    valid_values[name] = guide.loc[:, name].values
-# print(valid_values)
+@cached_loader
+def get_guides():
+    """
+        Загружает справочники при первом обращении.
+
+        Returns:
+                Dict[str, pd.DataFrame]: Признак -> справочник
+        """
+    return configure_guides(FILE_PATH)
 
-# Reading data from CSV
-data = pd.read_csv('./data/dataset.csv')
+
+@cached_loader
+def get_valid_values():
+    """
+        Собирает допустимые значения каждого признака из справочников.
+
+        Returns:
+                Dict[str, np.ndarray]: Признак -> допустимые значения
+        """
+    # Creating dictionary with valid values of each feature to filter invalid rows of df
+    valid_values = {}
+    for name, guide in get_guides().items():
+        valid_values[name] = guide.loc[:, name].values
+    return valid_values
+
+
+DATASET_PATH = os.environ.get('MUSHROOM_DATASET', './data/dataset.csv')
 
 
 def count_na_percentage(dataframe, feature):
@@ -70,29 +88,150 @@ def count_na_percentage(dataframe, feature):
     return percentage
 
 
-# Creating dictionary with percentages of NaN for each feature
-na_percentages = {}
-for col in data.columns:
-    na_percentages[col] = count_na_percentage(data, col)
+def load_dataset(path):
+    """
+        Читает исходный датасет из CSV.
 
-# Array of columns that have less than 50% of NaNs
-needed_columns = [
-    key for key in data.columns if na_percentages[key] < 50 and key != 'id']
-# print(needed_columns)
+        Args:
+                path (str): Путь к CSV файлу
 
-# Selecting only interesting columns
-data = data[needed_columns]
-# print(data.sample(5))
+        Returns:
+                pd.DataFrame: Сырые данные
+        """
+    return pd.read_csv(path)
 
-# Finding categorical columns
-cat_columns = [
-    key for key in data.columns if data[key].dtype not in ('int64', 'float64')]
-num_columns = [key for key in data.columns if key not in cat_columns]
 
-# Filling NaNs with mode and removing rows with invalid values
-for col in cat_columns:
-    data[col] = data[col].fillna(data[col].mode()[0])
-    data = data[data[col].isin(valid_values[col])]
+def clean_dataset(dataframe, valid_values, rules=None):
+    """
+        Оставляет колонки, в которых меньше 50% NaN, заполняет пропуски
+    категориальных признаков модой и удаляет строки с недопустимыми значениями.
+
+        Args:
+                dataframe (pd.DataFrame): Сырые данные
+                valid_values (Dict[str, np.ndarray]): Допустимые значения признаков
+                rules (dict): Правила очистки: оставляемые колонки ('columns') и значения
+                    для заполнения пропусков ('fill_values'). Пустой словарь заполняется
+                    правилами, вычисленными по dataframe, заполненный — применяется как есть,
+                    так новые строки очищаются так же, как весь датасет
+
+        Returns:
+                pd.DataFrame: Очищенные данные
+        """
+    if rules is None:
+        rules = {}
+
+    if 'columns' not in rules:
+        # Creating dictionary with percentages of NaN for each feature
+        na_percentages = {}
+        for col in dataframe.columns:
+            na_percentages[col] = count_na_percentage(dataframe, col)
+
+        # Array of columns that have less than 50% of NaNs
+        rules['columns'] = [
+            key for key in dataframe.columns if na_percentages[key] < 50 and key != 'id']
+        rules['fill_values'] = {}
+        fill_values = None
+    else:
+        fill_values = rules['fill_values']
+
+    # Selecting only interesting columns
+    dataframe = dataframe.reindex(columns=rules['columns'])
+
+    # Filling NaNs with mode and removing rows with invalid values
+    for col in dataframe.columns:
+        if fill_values is None:
+            if dataframe[col].dtype in ('int64', 'float64'):
+                continue
+            rules['fill_values'][col] = dataframe[col].mode()[0]
+        elif col not in fill_values:
+            dataframe[col] = pd.to_numeric(dataframe[col], errors='coerce')
+            continue
+        dataframe[col] = dataframe[col].fillna(rules['fill_values'][col])
+        dataframe = dataframe[dataframe[col].isin(valid_values[col])]
+    return dataframe
+
+
+@cached_loader
+def get_store():
+    """
+        Читает и очищает датасет при первом обращении,
+    чтобы импорт модуля не ждал загрузки данных.
+
+        Returns:
+                DataStore: Хранилище очищенных данных с возможностью дозаписи
+        """
+    rules = {}
+    # Reading data from CSV
+    return DataStore(DATASET_PATH, lambda raw: clean_dataset(raw, get_valid_values(), rules))
+
+
+def get_data():
+    """
+        Возвращает очищенный датасет вместе со всеми дописанными строками.
+
+        Returns:
+                pd.DataFrame: Очищенные данные
+        """
+    return get_store().frame()
+
+
+def append_rows(rows):
+    """
+        Дописывает новые наблюдения, очищая их по тем же правилам, что и весь датасет.
+
+        Args:
+                rows (pd.DataFrame): Сырые строки в формате dataset.csv
+
+        Returns:
+                Tuple[int, int]: Количество принятых строк и новая версия данных
+        """
+    return get_store().append(rows)
+
+
+def get_columns():
+    """
+        Разделяет колонки очищенного датасета на категориальные и числовые.
+
+        Returns:
+                Tuple[List[str], List[str]]: Категориальные и числовые колонки
+        """
+    data = get_data()
+    # Finding categorical columns
+    cat_columns = [
+        key for key in data.columns if data[key].dtype not in ('int64', 'float64')]
+    num_columns = [key for key in data.columns if key not in cat_columns]
+    return cat_columns, num_columns
+
+
+LAZY_ATTRIBUTES = {
+    'guides': get_guides,
+    'valid_values': get_valid_values,
+    'data': get_data,
+    'needed_columns': lambda: list(get_data().columns),
+    'cat_columns': lambda: get_columns()[0],
+    'num_columns': lambda: get_columns()[1],
+}
+
+
+def __getattr__(name):
+    """
+        Оставляет доступ к main.data, main.valid_values и т.п.,
+    вычисляя их только при первом обращении.
+        """
+    if name in LAZY_ATTRIBUTES:
+        return LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def load_seaborn():
+    """
+        Импортирует seaborn (и matplotlib) при первом построении графика.
+
+        Returns:
+                module: Модуль seaborn
+        """
+    import seaborn  # pylint: disable=import-outside-toplevel
+    return seaborn
 
 
 # ****************************************
@@ -194,7 +333,7 @@ def cap_diams_stem_heights(dataframe, width_begin, width_end, season):
 
 # plots                          
 
-def class_boxplot(dataframe, numeric_feature):
+def class_boxplot(dataframe, numeric_feature, path="./graphics/class_boxplot.png"):
     """
     Строит boxplot (ящик с усами) для числового признака,
     сгруппированного по классам грибов (poisonous/edible).
@@ -202,18 +341,19 @@ def class_boxplot(dataframe, numeric_feature):
     Args:
         dataframe (pd.DataFrame): Рассматриваемый датафрейм
         numeric_feature (str): Название признака
+        path (str | io.BytesIO): Куда сохранить PNG
 
     Returns:
         matplotlib.axes.Axes: Объект Axes с построенным boxplot
     """
-    plot = sns.boxplot(data=dataframe, x='class', y=numeric_feature, hue='class', showfliers=False)
+    plot = load_seaborn().boxplot(data=dataframe, x='class', y=numeric_feature, hue='class', showfliers=False)
     fig = plot.get_figure()
-    fig.savefig("./graphics/class_boxplot.png")
+    fig.savefig(path, format="png")
     plot.cla()
 
 
 
-def cap_diameter_histplot(dataframe, hue):
+def cap_diameter_histplot(dataframe, hue, path="./graphics/cap_diameter_histplot.png"):
     """
     Строит гистограмму распределения диаметров шляпки
     грибов с разделением по категориальному признаку.
@@ -221,18 +361,19 @@ def cap_diameter_histplot(dataframe, hue):
     Args:
         dataframe (pd.DataFrame): Рассматриваемый датафрейм
         hue (str): Название категориального признака
+        path (str | io.BytesIO): Куда сохранить PNG
 
     Returns:
         matplotlib.axes.Axes: Объект Axes с построенной гистограммой
     """
-    plot = sns.histplot(data=dataframe, x='cap-diameter', hue=hue, binrange=(0, 17))
+    plot = load_seaborn().histplot(data=dataframe, x='cap-diameter', hue=hue, binrange=(0, 17))
     fig = plot.get_figure()
-    fig.savefig("./graphics/cap_diameter_histplot.png")
+    fig.savefig(path, format="png")
     plot.cla()
 
 
 
-def stem_height_scatterplot(dataframe, numeric_feature, hue):
+def stem_height_scatterplot(dataframe, numeric_feature, hue, path="./graphics/stem_height_scatterplot.png"):
     """
     Строит точечный график зависимости между высотой ножки
     гриба и заданным числовым признаком с разделением по некоторому категориальному признаку.
@@ -241,18 +382,19 @@ def stem_height_scatterplot(dataframe, numeric_feature, hue):
         dataframe (pd.DataFrame): Рассматриваемый датафрейм
         numeric_feature (str): Название числового признака
         hue (str): Название категориального признака
+        path (str | io.BytesIO): Куда сохранить PNG
 
     Returns:
         matplotlib.axes.Axes: Объект Axes с построенным точечным графиком
     """
-    plot = sns.scatterplot(data=dataframe, x="stem-height", y=numeric_feature, hue=hue)
+    plot = load_seaborn().scatterplot(data=dataframe, x="stem-height", y=numeric_feature, hue=hue)
     fig = plot.get_figure()
-    fig.savefig("./graphics/stem_height_scatterplot.png")
+    fig.savefig(path, format="png")
     plot.cla()
 
 
 
-def stem_width_boxplot(dataframe, object_feature):
+def stem_width_boxplot(dataframe, object_feature, path="./graphics/stem_width_boxplot.png"):
     """
     Строит boxplot (ящик с усами) для диаметра шляпки,
     сгруппированного по заданному категориальному признаку.
@@ -260,13 +402,14 @@ def stem_width_boxplot(dataframe, object_feature):
     Args:
         dataframe (pd.DataFrame): Рассматриваемый датафрейм
         object_feature (str): Название категориального признака
+        path (str | io.BytesIO): Куда сохранить PNG
 
     Returns:
         matplotlib.axes.Axes: Объект Axes с построенным boxplot
     """
-    plot =  sns.boxplot(data=dataframe, x='cap-diameter', y=object_feature, showfliers=False)
+    plot = load_seaborn().boxplot(data=dataframe, x='cap-diameter', y=object_feature, showfliers=False)
     fig = plot.get_figure()
-    fig.savefig("./graphics/stem_width_boxplot.png")
+    fig.savefig(path, format="png")
     plot.cla()
 
 
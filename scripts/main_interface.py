@@ -5,16 +5,20 @@ Python project. Binary classification of mushrooms.
 Performed by: Andreev Alexander, Chapaykin Arseniy, Ro Alexander, Shmelev Anton 
 """
 
+import io
 import json
-from data_processing import DataPreprocessor # pylint: disable=unused-import
-import joblib
-from catboost import CatBoostClassifier
-import pandas as pd
-from main import data, feature_class_correlation, class_boxplot, cap_diameter_histplot
-from main import feature_mean_cap_diameter, class_ranged_by_stem_height, cap_diams_stem_heights
-from main import stem_height_scatterplot, stem_width_boxplot
+import uvicorn
+from PIL import Image
+from prediction import predict_one
+from explanation import explain_one, global_importance
+from reports import REPORTS, run_all, run_report
+from metrics import instrumented
+from api import create_app, parse_args, KEEP_ALIVE_TIMEOUT
 import gradio as gr
 
+APPROXIMATE_LABEL = "Приближённо (по выборке, быстрее на больших данных)"
+DASHBOARD_LABEL = "Построить все отчёты"
+
 
 
 def fetch_parameters():
@@ -173,11 +177,11 @@ def get_letter_by_value(feature: str, value) -> str | int | None:
                 value (str | int): Значение параметра.
 
             Returns:
-                str | int | None: Буквенный код параметра, если найден,
-                                  целое число, если value — int,
+                str | int | float | None: Буквенный код параметра, если найден,
+                                  число, если value — число,
                                   или None, если сопоставление невозможно.
             """
-    if isinstance(value, int):
+    if isinstance(value, (int, float)):
         return value
 
     if feature not in dct or feature not in letters_map:
@@ -196,164 +200,124 @@ def get_letter_by_value(feature: str, value) -> str | int | None:
     return letters[index]
 
 
-def feature_class_corr(feature):
+def sample_note(info):
     """
-        Вычисляет корреляцию между указанным признаком и целевым классом,
-        сохраняет результат в CSV-файл и возвращает его.
+        Формирует подпись к приближённому отчёту.
 
         Args:
-            feature (str): Название признака для расчёта корреляции.
+            info (dict | None): Описание выборки или None для точного отчёта.
 
         Returns:
-            pd.DataFrame: Таблица с рассчитанной корреляцией.
+            str: Текст подписи.
         """
-
-    while None is feature:
-        raise gr.Error("Выбери все параметры для гриба")
-
-    result = feature_class_correlation(data, feature)
-    result.to_csv('./graphics/feature_class_corr.csv')
-    return result
+    if info is None:
+        return ""
+    return (f"Оценка по выборке из {info['sample_size']} строк (всего {info['population']}), "
+            f"границы {round(info['confidence'] * 100)}% доверительного интервала — в колонках *_low и *_high")
 
 
-def feature_mean_cap_diam(*args):
+def present(report, result):
     """
-        Вычисляет средний диаметр шляпки гриба для комбинации трёх заданных параметров,
-        сохраняет результат в CSV-файл и возвращает его.
+        Переводит результат отчёта в значение для компонента Gradio.
 
         Args:
-            *args: Кортеж из трёх строк — значений признаков.
+            report (Report): Отчёт из реестра.
+            result: Результат run_report().
 
         Returns:
-            pd.DataFrame: Таблица со средними значениями диаметров.
+            pd.DataFrame | str | PIL.Image.Image: Таблица, HTML или изображение.
         """
-
-    while None in args[0] or len(args[0]) < 3:
-        raise gr.Error("Выбери все параметры для гриба")
-
-    feature_1, feature_2, feature_3 = args[0]
-
-    result = feature_mean_cap_diameter(data, feature_1, feature_2, feature_3)
-    result.to_csv('./graphics/feature_mean_cap_diam.csv')
-    return result.to_html()
-
-
-def class_ranged_by_height(*args):
-    """
-       Группирует грибы по диапазону высоты ножки и сохраняет результат в CSV-файл.
-
-       Args:
-           *args: Кортеж из двух значений — начала и конца диапазона.
-
-       Returns:
-           pd.DataFrame: Таблица с распределением по диапазону высот.
-       """
-
-    while None in args or len(args) < 2:
-        raise gr.Error("Выбери все параметры для гриба")
-
-    begin, end = args
-    result = class_ranged_by_stem_height(data, begin, end).to_frame().reset_index()
-    result.to_csv('./graphics/class_ranged_by_height.csv')
+    if report.output == "html":
+        return result.to_html()
+    if report.output == "image":
+        return Image.open(io.BytesIO(result))
     return result
 
 
-def cap_diams_heights(*args):
+def output_component(report):
     """
-        Группирует данные по диапазону диаметров шляпки и сезону,
-        возвращает результаты в виде таблицы и сохраняет в CSV.
-
-        Args:
-            *args: Кортеж из трёх значений — начала диапазона, конца диапазона и сезона.
-
-        Returns:
-            pd.DataFrame: Таблица с распределением по диапазонам диаметров и сезонам.
+        Создаёт компонент Gradio для вывода результата отчёта.
         """
+    if report.output == "html":
+        return gr.HTML()
+    if report.output == "image":
+        return gr.Image()
+    return gr.DataFrame()
 
-    while None in args or len(args) < 3:
-        raise gr.Error("Выбери все параметры для гриба")
 
-    width_begin, width_end, season = args
-    result = cap_diams_stem_heights(data, width_begin, width_end, season).reset_index()
-    result.to_csv('./graphics/cap_diams_heights.csv')
-    return result
-
-
-def boxplot(numeric_feature):
+def report_handler(report):
     """
-        Строит boxplot для числового признака по классам грибов
-        и сохраняет изображение.
+        Создаёт обработчик кнопки отчёта по его описанию в реестре.
 
         Args:
-            numeric_feature (str): Название числового признака.
+            report (Report): Отчёт из реестра.
 
         Returns:
-            str: Путь к сохранённому изображению.
+            Callable: Функция, принимающая значения входов отчёта
+                      (и флаг приближённого режима, если он поддерживается).
         """
-
-    while None is numeric_feature:
-        raise gr.Error("Выбери все параметры для гриба")
-
-    class_boxplot(data, numeric_feature)
-    return "./graphics/class_boxplot.png"
-
-
-def cap_diameter_hist(numeric_feature):
-    """
-       Строит гистограмму распределения диаметров шляпок грибов
-       и сохраняет изображение.
-
-       Args:
-           numeric_feature (str): Название числового признака.
-
-       Returns:
-           str: Путь к сохранённому изображению.
-       """
-
-    while None is numeric_feature:
-        raise gr.Error("Выбери все параметры для гриба")
-
-    cap_diameter_histplot(data, numeric_feature)
-    return "./graphics/cap_diameter_histplot.png"
-
-
-def stem_scatterplot(*args):
+    def handler(*args):
+        params = {param["arg"]: value for param, value in zip(report.inputs, args)}
+        approximate = len(args) > len(report.inputs) and bool(args[-1])
+        try:
+            result, info = run_report(report.name, params, approximate)
+        except ValueError as error:
+            raise gr.Error(str(error)) from error
+        values = report_values(report, result, info)
+        return values[0] if len(values) == 1 else tuple(values)
+    return handler
+
+
+def report_values(report, result, info):
     """
-        Строит scatterplot между числовым признаком и категориальным,
-        сохраняет изображение.
-
-        Args:
-            *args: Кортеж из двух значений — числового и категориального признака.
-
-        Returns:
-            str: Путь к сохранённому изображению.
+        Значения выходов блока отчёта: результат и, если отчёт поддерживает
+        приближённый режим, подпись о выборке.
         """
+    if report.approximate is None:
+        return [present(report, result)]
+    return [present(report, result), sample_note(info)]
 
-    while None in args or len(args) < 2:
-        raise gr.Error("Выбери все параметры для гриба")
 
-    numeric_feature, cat_feature = args
-    stem_height_scatterplot(data, numeric_feature, cat_feature)
-    return "./graphics/stem_height_scatterplot.png"
-
-
-def stem_boxplot(feature):
+def dashboard_handler(blocks):
     """
-        Строит boxplot для ширины ножки гриба по классам и сохраняет изображение.
+        Создаёт обработчик кнопки, строящей все отчёты сразу.
 
         Args:
-            feature (str): Название признака.
+            blocks (list): Пары (отчёт, количество его входов в интерфейсе)
+                           в порядке, в котором переданы входы и выходы.
 
         Returns:
-            str: Путь к сохранённому изображению.
+            Callable: Генератор, который после готовности каждого отчёта
+                      возвращает обновлённые выходы всех блоков и строку состояния.
         """
-
-    while None is feature:
-        raise gr.Error("Выбери все параметры для гриба")
-
-    stem_width_boxplot(data, feature)
-    return "./graphics/stem_width_boxplot.png"
-
+    def handler(*args):
+        params, approximate, slots = {}, [], {}
+        position, slot = 0, 0
+        for report, size in blocks:
+            values = args[position:position + size]
+            position += size
+            params[report.name] = {param["arg"]: value for param, value in zip(report.inputs, values)}
+            if len(values) > len(report.inputs) and values[-1]:
+                approximate.append(report.name)
+            slots[report.name] = (report, slot)
+            slot += 1 if report.approximate is None else 2
+
+        outputs = [gr.update() for _ in range(slot)]
+        done, failed = 0, []
+        for name, result, info, error in run_all(params, approximate):
+            report, start = slots[name]
+            if error is None:
+                done += 1
+                values = report_values(report, result, info)
+                outputs[start:start + len(values)] = values
+            else:
+                failed.append(f"{name}: {error if isinstance(error, ValueError) else repr(error)}")
+            status = f"Готово {done} из {len(blocks)}"
+            if failed:
+                status += "\n\n" + "\n\n".join(failed)
+            yield outputs + [status]
+            outputs = [gr.update() for _ in range(slot)]
+    return handler
 
 
 def head():
@@ -364,9 +328,8 @@ def head():
     with gr.Blocks() as demo:
         components = {}
         connections = []
-        tmp = fetch_parameters()
 
-        for param in tmp[:-12]:
+        for param in fetch_parameters():
             with gr.Group():
                 components[param["name"]] = create_component(param)
                 if param["prerequisites"]:
@@ -375,17 +338,17 @@ def head():
 
         setup_visibility(components, connections)
 
-        def debug(*args):
+        def mushroom_input(args):
             """
-                Отладочная функция, содержащая данные о возможных значениях параметров грибов
-                и их сопоставление с буквенными кодами.
-        
+                Переводит значения параметров гриба в буквенные коды
+                и проверяет, что заполнены все параметры (кроме типа кольца).
+
                 Args:
-                    *args: Переменное количество аргументов, не используется в теле функции.
+                    args (tuple): Значения компонентов в порядке components.
+
+                Returns:
+                    dict: Признак -> буквенный код или число.
             """
-            model = CatBoostClassifier()
-            model.load_model("./data/classifier.cbm")
-            preprocessor = joblib.load("./scripts/my_preprocessor.pkl")
             param = list(components.keys())
             pairs = zip(param, args)
             input_dict = {name: get_letter_by_value(name, value) for name, value in pairs}
@@ -393,106 +356,76 @@ def head():
             values = values[:8] + values[9:]
             while None in values:
                 raise gr.Error("Выбери все параметры для гриба")
-            data_dict = pd.DataFrame(input_dict, index=[0])
-            pd.set_option('display.max_columns', None)
-            x_prediction = preprocessor.transform(data_dict)
-            prediction = model.predict(x_prediction)
-            return str(prediction[0])
+            return input_dict
+
+        @instrumented("debug")
+        def debug(*args):
+            """
+                Отладочная функция, содержащая данные о возможных значениях параметров грибов
+                и их сопоставление с буквенными кодами.
+        
+                Args:
+                    *args: Переменное количество аргументов, не используется в теле функции.
+            """
+            return predict_one(mushroom_input(args))
         gr.Button("Submit") .click(# pylint: disable=no-member
             fn=debug, # noqa
+            api_name="predict", # noqa
             inputs=[comp[1] for comp in components.values()], # noqa
             outputs=gr.Textbox(label="Result")) # noqa
 
+        @instrumented("explain")
+        def explain_mushroom(*args):
+            """
+                Объясняет предсказание: вклад каждого параметра гриба,
+                положительный вклад — в сторону ядовитого класса.
 
-        tmp_lst = {tmp[-12]["name"]: create_component(tmp[-12])}
-
-
-        btn = gr.Button("Submit")
-        btn.click(# pylint: disable=no-member
-            fn=feature_class_corr,
-            inputs=[comp[1] for comp in tmp_lst.values()],
-            outputs=gr.DataFrame(headers=['1 уровень', '2 уровень', 'Значения'])
-        )
-
-
-        tmp_lst = {tmp[-11]["name"]: create_component(tmp[-11])}
-
-        btn = gr.Button("Submit")
-        btn.click(# pylint: disable=no-member
-            fn=feature_mean_cap_diam,
-            inputs=[comp[1] for comp in tmp_lst.values()],
-            outputs=gr.HTML()
-        )
-
-        tmp_lst = {tmp[-10]["name"]: create_component(tmp[-10]),
-                   tmp[-9]["name"]: create_component(tmp[-9])}
-
-
-        btn = gr.Button("Submit")
-        btn.click(# pylint: disable=no-member
-            fn=class_ranged_by_height,
-            inputs=[comp[1] for comp in tmp_lst.values()],
-            outputs=gr.DataFrame()
-        )
-
-        tmp_lst = {tmp[-8]["name"]: create_component(tmp[-8]),
-                   tmp[-7]["name"]: create_component(tmp[-7]),
-                   tmp[-6]["name"]: create_component(tmp[-6])}
-
-        btn = gr.Button("Submit")
-        btn.click(# pylint: disable=no-member
-            fn=cap_diams_heights,
-            inputs=[comp[1] for comp in tmp_lst.values()],
-            outputs=gr.DataFrame()
-        )
-
-        tmp_lst = {tmp[-5]["name"]: create_component(tmp[-5])}
-
-        btn = gr.Button("Submit")
-        btn.click(# pylint: disable=no-member
-            fn=boxplot,
-            inputs=[comp[1] for comp in tmp_lst.values()],
-            outputs=gr.Image()
-        )
-
-        cap_diameter = tmp[-4]["name"]
-        tmp_lst = {cap_diameter: create_component(tmp[-4])}
-
-
-
-        btn = gr.Button("Submit")
-        btn.click(# pylint: disable=no-member
-            fn=cap_diameter_hist,
-            inputs=[comp[1] for comp in tmp_lst.values()],
-            outputs=gr.Image()
-        )
-        tmp_lst = {tmp[-3]["name"]: create_component(tmp[-3]),
-                   tmp[-2]["name"]: create_component(tmp[-2])}
-
-
-
-
-        btn = gr.Button("Submit")
-        btn.click(# pylint: disable=no-member
-            fn=stem_scatterplot,
-            inputs=[comp[1] for comp in tmp_lst.values()],
-            outputs=gr.Image()
-        )
-
-
-        tmp_lst = {tmp[-1]["name"]: create_component(tmp[-1])}
-
-
-
-        btn = gr.Button("Submit")
-        btn.click(# pylint: disable=no-member
-            fn=stem_boxplot,
-            inputs=[comp[1] for comp in tmp_lst.values()],
-            outputs=gr.Image()
-        )
-
+                Args:
+                    *args: Значения параметров гриба.
 
-    demo.launch()
+                Returns:
+                    list: Строки таблицы (признак, вклад), по убыванию модуля вклада.
+            """
+            explanation = explain_one(mushroom_input(args))
+            return sorted(([name, round(value, 4)] for name, value in explanation["contributions"].items()),
+                          key=lambda row: -abs(row[1]))
+        gr.Button("Объяснить предсказание").click(# pylint: disable=no-member
+            fn=explain_mushroom,
+            api_name="explain",
+            inputs=[comp[1] for comp in components.values()],
+            outputs=gr.DataFrame(headers=['Признак', 'Вклад']))
+
+        importance = gr.DataFrame(headers=['Признак', 'Важность'], label="Важность признаков для модели")
+        demo.load(# pylint: disable=no-member
+            fn=lambda: [[name, round(value, 2)] for name, value in global_importance().items()],
+            outputs=importance)
+
+
+        blocks, report_inputs, report_outputs = [], [], []
+        for report in REPORTS.values():
+            inputs = [create_component(param)[1] for param in report.inputs]
+            outputs = [output_component(report)]
+            if report.approximate is not None:
+                inputs.append(gr.Checkbox(label=APPROXIMATE_LABEL))
+                outputs.append(gr.Markdown())
+            gr.Button("Submit").click(# pylint: disable=no-member
+                fn=report_handler(report),
+                inputs=inputs,
+                outputs=outputs)
+            blocks.append((report, len(inputs)))
+            report_inputs.extend(inputs)
+            report_outputs.extend(outputs)
+
+        dashboard_status = gr.Markdown()
+        gr.Button(DASHBOARD_LABEL).click(# pylint: disable=no-member
+            fn=dashboard_handler(blocks),
+            inputs=report_inputs,
+            outputs=report_outputs + [dashboard_status])
+
+
+    args = parse_args()
+    app = gr.mount_gradio_app(create_app(args.lazy, args.watch), demo, path="/")
+    uvicorn.run(app, host=args.host, port=args.port, timeout_keep_alive=KEEP_ALIVE_TIMEOUT)
 
 
 if __name__ == "__main__":
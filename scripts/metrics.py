@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Python project. Binary classification of mushrooms.
+
+Performed by: Andreev Alexander, Chapaykin Arseniy, Ro Alexander, Shmelev Anton
+"""
+
+import contextlib
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+# Границы корзин гистограммы задержек, в секундах
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_INTERVAL = 0.005
+PROFILE_PATH = './profiles'
+
+current_handler = contextvars.ContextVar('current_handler', default='none')
+
+
+class Metrics:
+    """
+    Потокобезопасное хранилище гистограмм задержек и счётчиков.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = defaultdict(lambda: [[0] * len(BUCKETS), 0.0, 0])
+        self.counters = defaultdict(float)
+
+    def observe(self, handler, stage, seconds):
+        """
+        Добавляет замер длительности этапа в гистограмму.
+        """
+        with self.lock:
+            buckets, _, _ = histogram = self.histograms[(handler, stage)]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def increment(self, name, value=1, **labels):
+        """
+        Увеличивает счётчик name с заданными метками.
+        """
+        with self.lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def render(self):
+        """
+        Выгружает метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Текст для эндпоинта /metrics.
+        """
+        lines = [
+            '# HELP mushroom_stage_duration_seconds Duration of request handling stages.',
+            '# TYPE mushroom_stage_duration_seconds histogram',
+        ]
+        with self.lock:
+            for (handler, stage), (buckets, total, count) in sorted(self.histograms.items()):
+                labels = f'handler="{handler}",stage="{stage}"'
+                for bound, value in zip(BUCKETS, buckets):
+                    lines.append(f'mushroom_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {value}')
+                lines.append(f'mushroom_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'mushroom_stage_duration_seconds_sum{{{labels}}} {total}')
+                lines.append(f'mushroom_stage_duration_seconds_count{{{labels}}} {count}')
+
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f'# TYPE {name} counter')
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter != name:
+                        continue
+                    text = ','.join(f'{key}="{val}"' for key, val in labels)
+                    lines.append(f'{name}{{{text}}} {float(value)!r}')
+        return '\n'.join(lines) + '\n'
+
+    def drain(self):
+        """
+        Забирает накопленные метрики и обнуляет хранилище, чтобы процесс пула
+        мог передать их основному процессу.
+
+        Returns:
+            tuple: Гистограммы и счётчики.
+        """
+        with self.lock:
+            collected = dict(self.histograms), dict(self.counters)
+            self.histograms.clear()
+            self.counters.clear()
+        return collected
+
+    def merge(self, collected):
+        """
+        Добавляет метрики, собранные в другом процессе, см. drain().
+        """
+        histograms, counters = collected
+        with self.lock:
+            for key, (buckets, total, count) in histograms.items():
+                histogram = self.histograms[key]
+                histogram[0] = [mine + theirs for mine, theirs in zip(histogram[0], buckets)]
+                histogram[1] += total
+                histogram[2] += count
+            for key, value in counters.items():
+                self.counters[key] += value
+
+
+METRICS = Metrics()
+
+
+class SlowRequestProfiler:
+    """
+    Сэмплирующий профилировщик: пока обрабатывается запрос, периодически
+    снимает стек его потока и, если запрос оказался медленным, сохраняет
+    стеки в свёрнутом формате (folded stacks) для построения flame graph.
+    """
+
+    def __init__(self, handler, threshold):
+        self.handler = handler
+        self.threshold = threshold
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+
+    def sample(self):
+        """
+        Снимает стек потока запроса каждые PROFILE_INTERVAL секунд.
+        """
+        while not self.stopped.wait(PROFILE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id) # pylint: disable=protected-access
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.sampler.join()
+        elapsed = time.perf_counter() - self.start
+        if elapsed >= self.threshold and self.stacks:
+            os.makedirs(PROFILE_PATH, exist_ok=True)
+            path = f'{PROFILE_PATH}/{self.handler}-{int(time.time() * 1000)}.folded'
+            with open(path, 'w', encoding='utf-8') as file:
+                for stack, count in self.stacks.items():
+                    file.write(f'{stack} {count}\n')
+        return False
+
+
+profile_threshold = None
+
+
+def set_profiling(slow_ms):
+    """
+    Включает профилирование запросов дольше slow_ms миллисекунд
+    или выключает его, если slow_ms равен None.
+    """
+    global profile_threshold # pylint: disable=global-statement
+    profile_threshold = None if slow_ms is None else slow_ms / 1000
+
+
+if os.environ.get('MUSHROOM_PROFILE_SLOW_MS'):
+    set_profiling(float(os.environ['MUSHROOM_PROFILE_SLOW_MS']))
+
+
+@contextlib.contextmanager
+def timed(stage):
+    """
+    Замеряет длительность этапа текущего обработчика.
+
+    Args:
+        stage (str): Название этапа, например 'transform' или 'to_csv'.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.observe(current_handler.get(), stage, time.perf_counter() - start)
+
+
+def instrumented(handler):
+    """
+    Декоратор обработчика: считает вызовы и ошибки, замеряет общее время
+    (этап 'total') и при включённом профилировании сэмплирует медленные запросы.
+
+    Args:
+        handler (str): Название обработчика в метриках.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            token = current_handler.set(handler)
+            METRICS.increment('mushroom_calls_total', handler=handler)
+            profiler = SlowRequestProfiler(handler, profile_threshold) \
+                if profile_threshold is not None else contextlib.nullcontext()
+            try:
+                with profiler, timed('total'):
+                    return function(*args, **kwargs)
+            except Exception:
+                METRICS.increment('mushroom_errors_total', handler=handler)
+                raise
+            finally:
+                current_handler.reset(token)
+        return wrapper
+    return decorator
+
+
+def record_rows(count):
+    """
+    Учитывает количество строк, обработанных текущим обработчиком.
+    """
+    METRICS.increment('mushroom_rows_processed_total', count, handler=current_handler.get())
+
+
+def record_cache(cache, hit):
+    """
+    Учитывает попадание или промах кэша.
+    """
+    METRICS.increment('mushroom_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Python project. Binary classification of mushrooms.
+
+Performed by: Andreev Alexander, Chapaykin Arseniy, Ro Alexander, Shmelev Anton
+"""
+
+import inspect
+import os
+import pandas as pd
+from loading import cached_loader
+from metrics import record_cache, record_rows, timed
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(ROOT_PATH, 'data', 'classifier.cbm')
+PREPROCESSOR_PATH = os.path.join(ROOT_PATH, 'scripts', 'my_preprocessor.pkl')
+
+
+@cached_loader
+def get_model():
+    """
+        Загружает модель CatBoost один раз за время работы приложения,
+    catboost импортируется только здесь.
+
+        Returns:
+                CatBoostClassifier: Обученная модель
+        """
+    from catboost import CatBoostClassifier  # pylint: disable=import-outside-toplevel
+    model = CatBoostClassifier()
+    model.load_model(MODEL_PATH)
+    return model
+
+
+@cached_loader
+def get_preprocessor():
+    """
+        Загружает обученный DataPreprocessor один раз за время работы приложения,
+    joblib и sklearn (через data_processing) импортируются только здесь.
+
+        Returns:
+                DataPreprocessor: Препроцессор, использованный при обучении модели
+        """
+    from joblib.numpy_pickle import NumpyUnpickler  # pylint: disable=import-outside-toplevel
+
+    class PreprocessorUnpickler(NumpyUnpickler):
+        """
+        my_preprocessor.pkl сохранён из скрипта, поэтому класс записан в нём
+        как __main__.DataPreprocessor. Загружаем его из data_processing,
+        чтобы pickle не зависел от того, какой скрипт запущен.
+        """
+
+        def find_class(self, module, name):
+            if module == '__main__' and name == 'DataPreprocessor':
+                module = 'data_processing'
+            return super().find_class(module, name)
+
+    kwargs = {}
+    # В новых версиях joblib у NumpyUnpickler есть обязательный параметр ensure_native_byte_order
+    if 'ensure_native_byte_order' in inspect.signature(NumpyUnpickler.__init__).parameters:
+        kwargs['ensure_native_byte_order'] = True
+    with open(PREPROCESSOR_PATH, 'rb') as file:
+        return PreprocessorUnpickler(PREPROCESSOR_PATH, file, **kwargs).load()
+
+
+def load_cached(loader, name):
+    """
+        Вызывает кэшированный загрузчик, учитывая в метриках попадание в кэш и время загрузки.
+
+        Args:
+                loader (Callable): Функция, обёрнутая в cached_loader
+                name (str): Название загружаемого объекта
+
+        Returns:
+                object: Загруженный объект
+        """
+    record_cache(name, loader.cache_info().currsize > 0)
+    with timed(f'load_{name}'):
+        return loader()
+
+
+def invalid_values(dataframe):
+    """
+        Ищет значения категориальных признаков, которые препроцессор
+    отбросит при трансформации.
+
+        Args:
+                dataframe (pd.DataFrame): Описания грибов в буквенных кодах
+
+        Returns:
+                Dict[int, List[str]]: Номер строки -> список признаков с недопустимыми значениями
+        """
+    valid_values = get_preprocessor().valid_values or {}
+    result = {}
+    for position, (_, row) in enumerate(dataframe.iterrows()):
+        bad = []
+        for col, allowed in valid_values.items():
+            if col not in row.index:
+                continue
+            # ring-type проверяется только у грибов с кольцом, как в DataPreprocessor
+            if col == 'ring-type' and row.get('has-ring') != 't':
+                continue
+            if row[col] not in allowed:
+                bad.append(col)
+        if bad:
+            result[position] = bad
+    return result
+
+
+def encode(dataframe):
+    """
+        Переводит описания грибов в признаки модели.
+
+        Args:
+                dataframe (pd.DataFrame): Описания грибов в буквенных кодах
+
+        Returns:
+                scipy.sparse.csr_matrix: Масштабированные числовые и one-hot категориальные признаки
+        """
+    preprocessor = load_cached(get_preprocessor, 'preprocessor')
+    dataframe = dataframe.copy()
+    # Для одной строки DataPreprocessor заполняет пропуск значением "unknown",
+    # заполняем заранее, чтобы пакетное предсказание не зависело от моды по пакету
+    for col in preprocessor.categorical_columns:
+        if col in dataframe.columns:
+            dataframe[col] = dataframe[col].fillna("unknown")
+    with timed('transform'):
+        return preprocessor.transform(dataframe).tocsr()
+
+
+def predict(dataframe):
+    """
+        Предсказывает класс для каждой строки датафрейма.
+
+        Args:
+                dataframe (pd.DataFrame): Описания грибов в буквенных кодах
+
+        Returns:
+                np.ndarray: Метки классов (e - съедобный, p - ядовитый)
+        """
+    x_prediction = encode(dataframe)
+    model = load_cached(get_model, 'model')
+    with timed('predict'):
+        prediction = model.predict(x_prediction)
+    record_rows(len(dataframe))
+    return prediction
+
+
+def predict_one(features):
+    """
+        Предсказывает класс одного гриба.
+
+        Args:
+                features (dict): Признак -> буквенный код или число
+
+        Returns:
+                str: Метка класса (e - съедобный, p - ядовитый)
+        """
+    return str(predict(pd.DataFrame(features, index=[0]))[0])
@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+"""
+Python project. Binary classification of mushrooms.
+
+Performed by: Andreev Alexander, Chapaykin Arseniy, Ro Alexander, Shmelev Anton
+"""
+
+import atexit
+import functools
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, Optional
+import pandas as pd
+from main import get_store, load_seaborn, feature_class_correlation, class_boxplot, cap_diameter_histplot
+from main import feature_mean_cap_diameter, class_ranged_by_stem_height, cap_diams_stem_heights
+from main import stem_height_scatterplot, stem_width_boxplot
+from metrics import METRICS, current_handler, instrumented, record_cache, record_rows, timed
+from sampling import approx_feature_class_correlation, approx_feature_mean_cap_diameter
+
+CATEGORICAL_FEATURES = ["cap-shape", "cap-surface", "cap-color",
+                        "does-bruise-or-bleed", "gill-attachment", "gill-color",
+                        "stem-color", "has-ring", "ring-type", "habitat", "season"]
+NUMERIC_FEATURES = ["cap-diameter", "stem-height", "stem-width"]
+SEASONS = ["a", "w", "u", "s"]
+
+REPORT_CACHE_SIZE = 256
+WORKERS = min(4, os.cpu_count() or 1)
+# Сколько последних снимков данных хранить для процессов пула
+SNAPSHOTS_KEPT = 2
+MISSING_PARAMETERS = "Выбери все параметры для гриба"
+
+
+def parameter(arg, label, param_type, values=None, size=None):
+    """
+    Описывает вход отчёта в формате fetch_parameters(), чтобы по нему
+    можно было построить компонент интерфейса через create_component().
+
+    Args:
+        arg (str): Имя аргумента функции отчёта и параметра запроса API.
+        label (str): Подпись в интерфейсе.
+        param_type (str): Тип параметра: 'text', 'number' или 'list'.
+        values (list): Допустимые значения.
+        size (int): Требуемое количество значений для типа 'list'.
+
+    Returns:
+        dict: Описание параметра.
+    """
+    return {"arg": arg, "name": label, "type": param_type, "values": values,
+            "size": size, "image": None, "prerequisites": None}
+
+
+@dataclass(frozen=True)
+class Report:
+    """
+    Описание отчёта: как его посчитать, какие у него входы, как его кэшировать
+    и где выполнять.
+
+    Attributes:
+        name: Идентификатор отчёта, он же путь в API и метка в метриках.
+        function: Функция (data, **params) -> результат.
+        inputs: Входы отчёта, см. parameter().
+        output: 'table' (pd.DataFrame), 'html' (сводная таблица) или 'image' (PNG в байтах).
+        cost: 'cheap' — считается в потоке запроса, 'expensive' — в пуле процессов.
+        cache: Кэшировать результат для одинаковых параметров и версии данных.
+        path: Куда сохранять результат: CSV для таблиц, PNG для графиков.
+        approximate: Функция (**params) -> (результат, описание выборки) для приближённого режима.
+    """
+    name: str
+    function: Callable
+    inputs: tuple
+    output: str
+    cost: str = "cheap"
+    cache: bool = True
+    path: Optional[str] = None
+    approximate: Optional[Callable] = None
+
+
+def plot(function):
+    """
+    Оборачивает функцию построения графика из main.py так, чтобы она
+    возвращала PNG в байтах, не сохраняя его в общий файл в ./graphics.
+    """
+    def render(data, **params):
+        buffer = io.BytesIO()
+        function(data, path=buffer, **params)
+        return buffer.getvalue()
+    return render
+
+
+REPORTS = OrderedDict((report.name, report) for report in [
+    Report(
+        name="feature-class-correlation",
+        function=lambda data, feature: feature_class_correlation(data, feature),
+        inputs=(parameter("feature", "Корреляция значений конкретного категориального признака "
+                                     "и целевого класса.", "text", CATEGORICAL_FEATURES),),
+        output="table",
+        path="./graphics/feature_class_corr.csv",
+        approximate=approx_feature_class_correlation,
+    ),
+    Report(
+        name="feature-mean-cap-diameter",
+        function=lambda data, features: feature_mean_cap_diameter(data, *features),
+        inputs=(parameter("features", "Сводная таблица со средним диаметром шляпки гриба по трём "
+                                      "признакам(выберите РОВНО три признака)",
+                          "list", CATEGORICAL_FEATURES, size=3),),
+        output="html",
+        path="./graphics/feature_mean_cap_diam.csv",
+        approximate=lambda features: approx_feature_mean_cap_diameter(*features),
+    ),
+    Report(
+        name="class-ranged-by-stem-height",
+        function=lambda data, begin, end: class_ranged_by_stem_height(data, begin, end).to_frame().reset_index(),
+        inputs=(parameter("begin", "Нижняя граница.Классы грибов, имеющих высоту ножки "
+                                   "из заданного диапазона", "number"),
+                parameter("end", "Верхняя граница.Классы грибов, имеющих высоту ножки "
+                                 "из заданного диапазона", "number")),
+        output="table",
+        cache=False,
+        path="./graphics/class_ranged_by_height.csv",
+    ),
+    Report(
+        name="cap-diams-stem-heights",
+        function=lambda data, width_begin, width_end, season: cap_diams_stem_heights(
+            data, width_begin, width_end, season).reset_index(),
+        inputs=(parameter("width_begin", "Нижняя граница. Значения диаметра шляпки и высоты ножки "
+                                         "грибов, имеющих заданный сезон произрастания и ширина "
+                                         "ножки которых лежит в заданном диапазоне", "number"),
+                parameter("width_end", "Верхняя граница. Значения диаметра шляпки и высоты ножки "
+                                       "грибов, имеющих заданный сезон произрастания и ширина "
+                                       "ножки которых лежит в заданном диапазоне", "number"),
+                parameter("season", "Выберите сезон(Лето, Осень, Зима, Весна)", "text", SEASONS)),
+        output="table",
+        cache=False,
+        path="./graphics/cap_diams_heights.csv",
+    ),
+    Report(
+        name="class-boxplot",
+        function=plot(class_boxplot),
+        path="./graphics/class_boxplot.png",
+        inputs=(parameter("numeric_feature", "Ящик с усами для числового признака, "
+                                             "сгруппированного по классам грибов",
+                          "text", NUMERIC_FEATURES),),
+        output="image",
+        cost="expensive",
+    ),
+    Report(
+        name="cap-diameter-histplot",
+        function=plot(cap_diameter_histplot),
+        path="./graphics/cap_diameter_histplot.png",
+        inputs=(parameter("hue", "Гистограмма распределения диаметров шляпки грибов "
+                                 "с разделением по категориальному признаку",
+                          "text", CATEGORICAL_FEATURES),),
+        output="image",
+        cost="expensive",
+    ),
+    Report(
+        name="stem-height-scatterplot",
+        function=plot(stem_height_scatterplot),
+        path="./graphics/stem_height_scatterplot.png",
+        inputs=(parameter("numeric_feature", "Выберите числовой признак. Точечный график "
+                                             "зависимости между высотой ножки гриба и заданным "
+                                             "числовым признаком с разделением по некоторому "
+                                             "категориальному признаку",
+                          "text", ["cap-diameter", "stem-width"]),
+                parameter("hue", "Введите категориальный признак. Точечный график зависимости "
+                                 "между высотой ножки гриба и заданным числовым признаком "
+                                 "с разделением по некоторому категориальному признаку",
+                          "text", CATEGORICAL_FEATURES)),
+        output="image",
+        cost="expensive",
+    ),
+    Report(
+        name="stem-width-boxplot",
+        function=plot(stem_width_boxplot),
+        path="./graphics/stem_width_boxplot.png",
+        inputs=(parameter("object_feature", "Boxplot (ящик с усами) для диаметра шляпки, "
+                                            "сгруппированного по заданному категориальному признаку",
+                          "text", CATEGORICAL_FEATURES),),
+        output="image",
+        cost="expensive",
+    ),
+])
+
+
+def validate(report, params):
+    """
+    Проверяет и приводит параметры отчёта к нужным типам по его описанию входов.
+
+    Args:
+        report (Report): Отчёт.
+        params (dict): Имя аргумента -> значение.
+
+    Returns:
+        dict: Проверенные параметры.
+
+    Raises:
+        ValueError: Если параметр не задан или недопустим.
+    """
+    result = {}
+    for param in report.inputs:
+        value = params.get(param["arg"])
+        if value is None or (param["type"] == "list" and None in value):
+            raise ValueError(MISSING_PARAMETERS)
+        if param["type"] == "number":
+            value = float(value)
+        elif param["type"] == "list":
+            value = list(value)
+            if param["size"] is not None and len(value) != param["size"]:
+                raise ValueError(f"Выберите ровно {param['size']} значения для {param['arg']}")
+        values = value if param["type"] == "list" else [value]
+        if param["values"] is not None and any(item not in param["values"] for item in values):
+            raise ValueError(f"Недопустимое значение {param['arg']}, ожидается одно из {param['values']}")
+        result[param["arg"]] = value
+    return result
+
+
+def compute(report, data, params):
+    """
+    Считает отчёт по данным.
+    """
+    with timed("compute"):
+        result = report.function(data, **params)
+    record_rows(len(data))
+    return result
+
+
+def save(report, result, approximate=False):
+    """
+    Сохраняет результат отчёта в ./graphics. Файл пишется во временный и затем
+    атомарно заменяет прежний, поэтому одновременные запросы не перемешивают
+    содержимое. Приближённый результат сохраняется рядом, с суффиксом _approx.
+    """
+    if report.path is None:
+        return
+    path = report.path
+    if approximate:
+        root, extension = os.path.splitext(path)
+        path = f"{root}_approx{extension}"
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with timed("save"):
+        if report.output == "image":
+            with open(temporary, "wb") as file:
+                file.write(result)
+        else:
+            result.to_csv(temporary)
+        os.replace(temporary, path)
+
+
+def init_worker():
+    """
+    Подготавливает процесс пула: графики рисуются без дисплея,
+    seaborn импортируется заранее.
+    """
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    load_seaborn()
+
+
+@functools.lru_cache(maxsize=1)
+def load_snapshot(path):
+    """
+    Загружает в процессе пула снимок данных, см. publish().
+    Процесс держит в памяти только последний загруженный снимок.
+    """
+    return pd.read_pickle(path)
+
+
+def compute_in_worker(name, params, path):
+    """
+    Выполняется в процессе пула. Если снимок данных уже удалён (данные
+    успели несколько раз измениться), результат None, и отчёт считается
+    в основном процессе.
+
+    Returns:
+        tuple: Результат и метрики процесса (этапы и строки) для основного процесса.
+    """
+    token = current_handler.set(name)
+    try:
+        with timed("load_snapshot"):
+            data = load_snapshot(path)
+        result = compute(REPORTS[name], data, params)
+    except FileNotFoundError:
+        result = None
+    finally:
+        current_handler.reset(token)
+    return result, METRICS.drain()
+
+
+report_cache = OrderedDict()
+cache_lock = threading.Lock()
+# pyplot хранит общее состояние, поэтому графики в основном процессе строим по одному
+plot_lock = threading.Lock()
+pool_lock = threading.Lock()
+worker_pool = None
+snapshot_lock = threading.Lock()
+snapshot_dir = None
+snapshots = []
+
+
+def get_pool():
+    """
+    Возвращает пул процессов для дорогих отчётов. Процессы запускаются через
+    forkserver (или spawn, где его нет), а не fork: в сервере уже работают
+    потоки, и захваченные ими блокировки не должны попасть в процессы пула.
+    Пул создаётся один раз, данные процессы получают из снимков, см. publish().
+    """
+    global worker_pool # pylint: disable=global-statement
+    with pool_lock:
+        if worker_pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            worker_pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=context,
+                                              initializer=init_worker)
+        return worker_pool
+
+
+def reset_pool(pool):
+    """
+    Отбрасывает пул, если один из его процессов упал; следующий отчёт создаст новый.
+    """
+    global worker_pool # pylint: disable=global-statement
+    with pool_lock:
+        if worker_pool is pool:
+            worker_pool = None
+    pool.shutdown(wait=False)
+
+
+def warm_pool():
+    """
+    Запускает процессы пула заранее, чтобы первый график не ждал
+    их запуска и импорта seaborn.
+    """
+    pool = get_pool()
+    for future in [pool.submit(os.getpid) for _ in range(WORKERS)]:
+        future.result()
+
+
+def publish(version, data):
+    """
+    Сохраняет снимок данных версии version для процессов пула (один раз
+    на версию) и удаляет старые снимки.
+
+    Returns:
+        str: Путь к снимку.
+    """
+    global snapshot_dir # pylint: disable=global-statement
+    with snapshot_lock:
+        if snapshot_dir is None:
+            snapshot_dir = tempfile.mkdtemp(prefix="mushroom-reports-")
+            atexit.register(shutil.rmtree, snapshot_dir, True)
+        path = os.path.join(snapshot_dir, f"{version}.pkl")
+        if path not in snapshots:
+            with timed("publish"):
+                data.to_pickle(path + ".tmp", compression=None)
+                os.replace(path + ".tmp", path)
+            snapshots.append(path)
+            while len(snapshots) > SNAPSHOTS_KEPT:
+                os.remove(snapshots.pop(0))
+        return path
+
+
+def submit(report, params, version, data):
+    """
+    Запускает вычисление отчёта с учётом его стоимости.
+
+    Returns:
+        Callable[[], object]: Функция, возвращающая результат (дожидается его для дорогих отчётов).
+    """
+    if report.cost == "expensive":
+        path = publish(version, data)
+        pool = get_pool()
+        try:
+            future = pool.submit(compute_in_worker, report.name, params, path)
+        except BrokenProcessPool:
+            reset_pool(pool)
+            future = None
+
+        def wait():
+            try:
+                with timed("worker"):
+                    result, collected = future.result() if future is not None else (None, None)
+                if collected is not None:
+                    METRICS.merge(collected)
+            except BrokenProcessPool:
+                reset_pool(pool)
+                result = None
+            if result is None:
+                with plot_lock:
+                    result = compute(report, data, params)
+            return result
+        return wait
+
+    result = compute(report, data, params)
+    return lambda: result
+
+
+def cache_key(report, params, approximate, version):
+    """
+    Ключ кэша отчёта: параметры, режим и версия данных.
+    """
+    frozen = tuple((key, tuple(value) if isinstance(value, list) else value)
+                   for key, value in sorted(params.items()))
+    return report.name, frozen, approximate, version
+
+
+def run_report(name, params, approximate=False):
+    """
+    Проверяет параметры и возвращает результат отчёта из кэша или считает его.
+
+    Args:
+        name (str): Идентификатор отчёта из REPORTS.
+        params (dict): Имя аргумента -> значение.
+        approximate (bool): Оценить по выборке, если отчёт это поддерживает.
+
+    Returns:
+        tuple: Результат отчёта и описание выборки (None для точного результата).
+
+    Raises:
+        KeyError: Если отчёта нет.
+        ValueError: Если параметры недопустимы.
+    """
+    report = REPORTS[name]
+    return instrumented(report.name)(execute)(report, validate(report, params), approximate)
+
+
+def execute(report, params, approximate=False):
+    """
+    Выполняет уже проверенный отчёт, см. run_report().
+    """
+    approximate = approximate and report.approximate is not None
+    store = get_store()
+    # Приближённый отчёт считается по выборке, склеивать весь датасет для него не нужно
+    version, data = (store.version, None) if approximate else store.snapshot()
+    key = cache_key(report, params, approximate, version)
+    cached = None
+    if report.cache:
+        with cache_lock:
+            cached = report_cache.get(key)
+            if cached is not None:
+                report_cache.move_to_end(key)
+        record_cache(f"report:{report.name}", cached is not None)
+
+    if cached is not None:
+        result = cached
+    elif approximate:
+        with timed("compute"):
+            result = report.approximate(**params)
+        record_rows(result[1]["sample_size"])
+    else:
+        result = submit(report, params, version, data)(), None
+
+    if report.cache and cached is None:
+        with cache_lock:
+            report_cache[key] = result
+            while len(report_cache) > REPORT_CACHE_SIZE:
+                report_cache.popitem(last=False)
+    # Файл в ./graphics всегда соответствует последнему запросу, в том числе из кэша
+    save(report, result[0], approximate)
+    return result
+
+
+def run_all(params, approximate=()):
+    """
+    Считает несколько отчётов одновременно: таблицы — в пуле потоков,
+    графики — в пуле процессов (через submit()), поэтому общее время близко
+    ко времени самого долгого отчёта, а не к их сумме.
+
+    Args:
+        params (dict): Идентификатор отчёта -> его параметры.
+        approximate (Iterable[str]): Отчёты, которые нужно оценить по выборке.
+
+    Yields:
+        tuple: Идентификатор отчёта, результат, описание выборки и ошибка
+               (ValueError при недопустимых параметрах, любое другое исключение,
+               если отчёт упал, иначе None) — в порядке готовности. Ошибка одного
+               отчёта не прерывает остальные.
+
+    Raises:
+        KeyError: Если какого-то отчёта нет.
+    """
+    for name in params:
+        if name not in REPORTS:
+            raise KeyError(name)
+    approximate = set(approximate)
+    with ThreadPoolExecutor(max_workers=max(len(params), 1), thread_name_prefix="report") as executor:
+        futures = {executor.submit(run_report, name, report_params, name in approximate): name
+                   for name, report_params in params.items()}
+        for future in as_completed(futures):
+            try:
+                result, info = future.result()
+            except Exception as error: # pylint: disable=broad-exception-caught
+                yield futures[future], None, None, error
+                continue
+            yield futures[future], result, info, None
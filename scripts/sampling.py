@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Python project. Binary classification of mushrooms.
+
+Performed by: Andreev Alexander, Chapaykin Arseniy, Ro Alexander, Shmelev Anton
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+from main import get_store
+from loading import cached_loader
+
+STRATA = ['class', 'season']
+SAMPLE_PER_STRATUM = 5000
+# Квантиль нормального распределения для 95% доверительного интервала
+Z_95 = 1.959964
+
+
+class StratifiedSample:
+    """
+    Стратифицированная выборка из датасета: в каждой страте (class, season)
+    хранится резервуар из не более чем capacity строк, который обновляется
+    при дозаписи данных алгоритмом R, так что выборка остаётся равновероятной
+    без перечитывания всего датасета.
+    """
+
+    def __init__(self, capacity=SAMPLE_PER_STRATUM, seed=0):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.Lock()
+        self.reservoirs = {}
+        self.population = {}
+        self.version = None
+
+    def rebuild(self, dataframe, version=None):
+        """
+        Строит выборку заново по всему датасету.
+        """
+        with self.lock:
+            self.reservoirs = {}
+            self.population = {}
+            for stratum, group in dataframe.groupby(STRATA, sort=False):
+                self.population[stratum] = len(group)
+                if len(group) > self.capacity:
+                    positions = self.rng.choice(len(group), self.capacity, replace=False)
+                    group = group.iloc[np.sort(positions)]
+                self.reservoirs[stratum] = group
+            self.version = version
+
+    def update(self, rows, version, reload):
+        """
+        Подписчик DataStore: добавляет новые строки в резервуары.
+        """
+        if reload:
+            self.rebuild(rows, version)
+            return
+        with self.lock:
+            for stratum, group in rows.groupby(STRATA, sort=False):
+                self.add(stratum, group)
+            self.version = version
+
+    def add(self, stratum, group):
+        """
+        Алгоритм R для пачки строк одной страты.
+        """
+        seen = self.population.get(stratum, 0)
+        reservoir = self.reservoirs.get(stratum, group.iloc[:0])
+        self.population[stratum] = seen + len(group)
+
+        free = max(self.capacity - len(reservoir), 0)
+        if free:
+            reservoir = pd.concat([reservoir, group.iloc[:free]])
+            group = group.iloc[free:]
+            seen += free
+        if len(group):
+            # t-я по счёту строка страты попадает в резервуар с вероятностью capacity / t
+            positions = seen + np.arange(1, len(group) + 1)
+            slots = (self.rng.random(len(group)) * positions).astype(np.int64)
+            accepted = np.flatnonzero(slots < self.capacity)
+            if len(accepted):
+                # Если в один слот попало несколько строк, остаётся последняя
+                last = pd.Series(accepted, index=slots[accepted]).groupby(level=0).last()
+                reservoir = reservoir.copy()
+                reservoir.iloc[last.index.to_numpy()] = group.iloc[last.to_numpy()].to_numpy()
+                index = reservoir.index.to_numpy(copy=True)
+                index[last.index.to_numpy()] = group.index[last.to_numpy()]
+                reservoir.index = index
+        self.reservoirs[stratum] = reservoir
+
+    def snapshot(self):
+        """
+        Возвращает выборку с колонками размера страты и выборки.
+
+        Returns:
+            pd.DataFrame: Строки выборки с дополнительными колонками
+                          '_population' (N_h) и '_sample' (n_h)
+        """
+        with self.lock:
+            frames = []
+            for stratum, reservoir in self.reservoirs.items():
+                if not len(reservoir):
+                    continue
+                frame = reservoir.copy()
+                frame['_stratum'] = '|'.join(stratum)
+                frame['_population'] = self.population[stratum]
+                frame['_sample'] = len(reservoir)
+                frames.append(frame)
+        return pd.concat(frames) if frames else pd.DataFrame()
+
+
+@cached_loader
+def get_sample():
+    """
+    Создаёт выборку по загруженному датасету и подписывает её на дозапись строк.
+
+    Returns:
+        StratifiedSample: Поддерживаемая в актуальном состоянии выборка
+    """
+    store = get_store()
+    sample = StratifiedSample()
+    with store.lock:
+        version, frame = store.snapshot()
+        sample.rebuild(frame, version)
+        store.subscribe(sample.update)
+    return sample
+
+
+def sample_info(sample):
+    """
+    Описание выборки, по которой посчитана оценка.
+
+    Returns:
+        dict: Размер выборки, размер датасета и уровень доверия
+    """
+    strata = sample.drop_duplicates('_stratum')
+    return {
+        "sample_size": int(len(sample)),
+        "population": int(strata['_population'].sum()),
+        "confidence": 0.95,
+    }
+
+
+def approx_feature_class_correlation(feature):
+    """
+        Оценивает по выборке количество встречаемых значений признака
+    в разбивке по классам с 95% доверительными интервалами.
+
+        Args:
+                feature (str): Название признака
+
+        Returns:
+                Tuple[pd.DataFrame, dict]: Таблица с колонками feature, class, count,
+                count_low, count_high и описание выборки
+        """
+    sample = get_sample().snapshot()
+    levels = [feature, 'class'] if feature != 'class' else ['class']
+    cells = sample.groupby(['_stratum'] + levels).agg(
+        hits=('_sample', 'size'), population=('_population', 'first'), size=('_sample', 'first'))
+
+    share = cells['hits'] / cells['size']
+    cells['estimate'] = cells['population'] * share
+    # Дисперсия оценки численности в страте с поправкой на конечность совокупности
+    cells['variance'] = (cells['population'] ** 2 * (1 - cells['size'] / cells['population'])
+                         * share * (1 - share) / (cells['size'] - 1).clip(lower=1))
+
+    result = cells.groupby(level=levels)[['estimate', 'variance']].sum()
+    margin = Z_95 * np.sqrt(result['variance'])
+    result = pd.DataFrame({
+        'count': result['estimate'].round().astype(int),
+        'count_low': (result['estimate'] - margin).clip(lower=0).round().astype(int),
+        'count_high': (result['estimate'] + margin).round().astype(int),
+    }).reset_index()
+    return result, sample_info(sample)
+
+
+def approx_feature_mean_cap_diameter(feature_1, feature_2, feature_3):
+    """
+        Оценивает по выборке средний диаметр шляпки по комбинациям трёх
+    признаков с 95% доверительными интервалами.
+
+        Args:
+                feature_1 (str): Название первого признака
+                feature_2 (str): Название второго признака
+                feature_3 (str): Название третьего признака
+
+        Returns:
+                Tuple[pd.DataFrame, dict]: Таблица с индексом из трёх признаков и колонками
+                mean, mean_low, mean_high, n (строк выборки в ячейке) и описание выборки
+        """
+    features = [feature_1, feature_2, feature_3]
+    sample = get_sample().snapshot()
+    info = sample_info(sample)
+    sample = sample.dropna(subset=['cap-diameter'])
+    sample['_weight'] = sample['_population'] / sample['_sample']
+    sample['_weighted'] = sample['_weight'] * sample['cap-diameter']
+
+    cells = sample.groupby(features).agg(
+        total=('_weighted', 'sum'), size=('_weight', 'sum'), n=('_weight', 'size'))
+    cells['mean'] = cells['total'] / cells['size']
+
+    # Дисперсия оценки отношения через линеаризацию: z = (y - mean) / N_g внутри ячейки, 0 вне её
+    sample = sample.join(cells[['mean', 'size']], on=features)
+    sample['_deviation'] = sample['cap-diameter'] - sample['mean']
+    sample['_deviation_sq'] = sample['_deviation'] ** 2
+    strata = sample.groupby(features + ['_stratum']).agg(
+        s1=('_deviation', 'sum'), s2=('_deviation_sq', 'sum'),
+        population=('_population', 'first'), n_h=('_sample', 'first'))
+    variance_z = (strata['s2'] - strata['s1'] ** 2 / strata['n_h']) / (strata['n_h'] - 1).clip(lower=1)
+    strata['variance'] = (strata['population'] ** 2 * (1 - strata['n_h'] / strata['population'])
+                          * variance_z / strata['n_h'])
+    variance = strata.groupby(level=features)['variance'].sum() / cells['size'] ** 2
+
+    # В ячейках с малым числом строк выборки нормальный квантиль даёт слишком узкий
+    # интервал, поэтому берём квантиль распределения Стьюдента с n - 1 степенями свободы
+    from scipy.stats import t  # pylint: disable=import-outside-toplevel
+    margin = t.ppf(0.975, (cells['n'] - 1).clip(lower=1)) * np.sqrt(variance)
+    result = pd.DataFrame({
+        'mean': cells['mean'],
+        'mean_low': cells['mean'] - margin,
+        'mean_high': cells['mean'] + margin,
+        'n': cells['n'],
+    })
+    return result, info
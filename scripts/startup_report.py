@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Python project. Binary classification of mushrooms.
+
+Отчёт о времени запуска: самые тяжёлые импорты (по данным python -X importtime)
+и время от старта процесса до ответа /api/health и до окончания прогрева.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+SCRIPTS_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_times(module):
+    """
+    Импортирует модуль в отдельном процессе с -X importtime.
+
+    Args:
+        module (str): Имя модуля из папки scripts.
+
+    Returns:
+        tuple: Общее время импорта в секундах и словарь
+               пакет -> суммарное время в секундах для пакетов,
+               которые модуль импортирует напрямую.
+    """
+    # main.py при импорте меняет рабочий каталог, поэтому путь к scripts задаём явно
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(
+        filter(None, [SCRIPTS_PATH, os.environ.get("PYTHONPATH")]))}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPTS_PATH, env=env, capture_output=True, text=True, check=True)
+
+    packages = defaultdict(float)
+    total = 0.0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Вложенные импорты отбиты двумя пробелами на уровень
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        seconds = int(cumulative) / 1e6
+        if depth == 0:
+            total += seconds
+        elif depth == 1:
+            packages[name.strip().split(".")[0]] += seconds
+    return total, packages
+
+
+def wait_for_health(script, port, timeout):
+    """
+    Запускает сервер в ленивом режиме и замеряет время до ответа /api/health
+    и до окончания фонового прогрева.
+
+    Returns:
+        tuple: Время до первого ответа и до прогрева в секундах (None, если не дождались).
+    """
+    url = f"http://127.0.0.1:{port}/api/health"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, script, "--lazy", "--port", str(port)],
+        cwd=SCRIPTS_PATH, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    healthy = warm = None
+    try:
+        while time.perf_counter() - start < timeout and warm is None:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    status = json.loads(response.read())
+                if healthy is None:
+                    healthy = time.perf_counter() - start
+                if status.get("warm"):
+                    warm = time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait()
+    return healthy, warm
+
+
+def main():
+    """
+    Точка входа отчёта о запуске.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--script", default="api.py", help="api.py (без UI) или main_interface.py")
+    parser.add_argument("--port", type=int, default=7861)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target", type=float, default=1.0, help="Целевое время до ответа /api/health, с")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    module = os.path.splitext(args.script)[0]
+    total, packages = import_times(module)
+    print(f"import {module}: {total:.3f} s")
+    for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<30} {seconds:8.3f} s")
+
+    healthy, warm = wait_for_health(args.script, args.port, args.timeout)
+    print(f"time to /api/health: {healthy:.3f} s" if healthy is not None else "health check: timeout")
+    print(f"time to warm:        {warm:.3f} s" if warm is not None else "warm-up: timeout")
+
+    if healthy is None or healthy > args.target:
+        print(f"Target of {args.target:.3f} s to health check is not met")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()